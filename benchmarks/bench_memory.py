@@ -0,0 +1,162 @@
+"""Measure the memory allocated per hash, for deep and wide structs, and the memory held by each struct instance.
+
+For each operation, reports the peak memory allocated while it runs (transient buffers, lists and the like),
+and how much of it is still held afterwards.
+Instance sizes compare the layout from before struct instances had slots (every attribute in an instance
+``__dict__``, nothing kept once hashed), the default layout, compact instances of a subclass declaring
+``__slots__ = ()``, and compact instances that don't keep their encodings (``cache_encodings = False``).
+
+Usage:
+    python -m benchmarks.bench_memory
+"""
+import random
+import tracemalloc
+
+from eip712_structs import Address, Array, Bytes, EIP712Struct, String, Uint
+
+
+class Wide(EIP712Struct):
+    pass
+
+
+for i in range(32):
+    setattr(Wide, f'u{i}', Uint(256))
+    setattr(Wide, f'a{i}', Address())
+
+
+class Leaf(EIP712Struct):
+    name = String()
+    value = Uint(256)
+    owner = Address()
+
+
+def make_deep_struct(depth):
+    """A chain of structs, each holding the next one and a few basic members."""
+    child = Leaf
+    for level in range(depth):
+        node = type(f'Node{level}', (EIP712Struct,), {})
+        node.child = child
+        node.label = String()
+        node.amount = Uint(256)
+        node.amounts = Array(Uint(256))
+        child = node
+    return child
+
+
+def make_deep_values(depth, rng):
+    values = {'name': 'leaf', 'value': rng.getrandbits(256), 'owner': rng.getrandbits(160).to_bytes(20, 'big')}
+    for level in range(depth):
+        values = {'child': values, 'label': f'level {level}', 'amount': level, 'amounts': [1, 2, 3]}
+    return values
+
+
+class Order(EIP712Struct):
+    pass
+
+
+class CompactOrder(EIP712Struct):
+    __slots__ = ()
+
+
+class UncachedOrder(EIP712Struct):
+    __slots__ = ()
+    cache_encodings = False
+
+
+for order_class in (Order, CompactOrder, UncachedOrder):
+    for name in ('maker', 'taker', 'makerAsset', 'takerAsset'):
+        setattr(order_class, name, Address())
+    order_class.makerAmount = Uint(256)
+    order_class.takerAmount = Uint(256)
+    order_class.expiry = Uint(64)
+    order_class.salt = Bytes(32)
+
+
+class BaselineOrder:
+    """Instances laid out like struct instances were before ``__slots__`` and the per-instance encoding cache: a plain
+    object with type_name, none_val and the values dict in its ``__dict__``. Hashing kept nothing on the instance.
+    """
+    def __init__(self, **kwargs):
+        self.type_name = Order.type_name
+        self.none_val = None
+        self.values = dict()
+        for name, _ in Order.get_members():
+            self.values[name] = kwargs.get(name)
+
+    def hash_struct(self):
+        return Order.compile().hash_struct(self.values)
+
+
+def measure_memory(fn, number=200):
+    """Returns the average (peak allocated, retained) bytes per call of fn."""
+    fn()  # Warm up any class-level caches
+    total_peak = 0
+    total_retained = 0
+    for _ in range(number):
+        tracemalloc.start()
+        result = fn()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        total_peak += peak
+        total_retained += retained
+        del result
+    return total_peak / number, total_retained / number
+
+
+def measure_instances(struct_class, values, number=10000, hashed=False):
+    """Returns the average bytes held by each of ``number`` live instances."""
+    tracemalloc.start()
+    instances = [struct_class(**values) for _ in range(number)]
+    if hashed:
+        for instance in instances:
+            instance.hash_struct()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    return retained / number
+
+
+def report(label, fn):
+    peak, retained = measure_memory(fn)
+    print(f'{label:<36} peak {peak:>10,.0f} bytes/op   retained {retained:>10,.0f} bytes/op')
+
+
+def main():
+    rng = random.Random(712)
+    wide_values = {}
+    for i in range(32):
+        wide_values[f'u{i}'] = rng.getrandbits(256)
+        wide_values[f'a{i}'] = rng.getrandbits(160).to_bytes(20, 'big')
+    wide = Wide(**wide_values)
+
+    Deep = make_deep_struct(8)
+    deep_values = make_deep_values(8, rng)
+    deep = Deep(**deep_values)
+
+    def change_and_rehash():
+        wide['u0'] = rng.getrandbits(64)
+        return wide.hash_struct()
+
+    report('wide: fresh instance hash', lambda: Wide(**wide_values).hash_struct())
+    report('wide: re-hash, one field changed', change_and_rehash)
+    report('wide: compiled hash', lambda: Wide.compile().hash_struct(wide_values))
+    report('deep: fresh instance hash', lambda: Deep(**deep_values).hash_struct())
+    report('deep: re-hash, unchanged', deep.hash_struct)
+    report('deep: compiled hash', lambda: Deep.compile().hash_struct(deep_values))
+
+    order_values = {
+        'maker': rng.getrandbits(160).to_bytes(20, 'big'), 'taker': rng.getrandbits(160).to_bytes(20, 'big'),
+        'makerAsset': rng.getrandbits(160).to_bytes(20, 'big'), 'takerAsset': rng.getrandbits(160).to_bytes(20, 'big'),
+        'makerAmount': rng.getrandbits(128), 'takerAmount': rng.getrandbits(128), 'expiry': 1700000000,
+        'salt': rng.getrandbits(256).to_bytes(32, 'big'),
+    }
+    print()
+    layouts = [('baseline', BaselineOrder), ('default', Order), ('compact', CompactOrder), ('uncached', UncachedOrder)]
+    for label, struct_class in layouts:
+        fresh = measure_instances(struct_class, order_values)
+        hashed = measure_instances(struct_class, order_values, hashed=True)
+        print(f'order instance, {label + " layout":<18} {fresh:>8,.0f} bytes   {hashed:>8,.0f} bytes once hashed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Compare the primitive encoders against the previous implementation.
+
+Usage:
+    python -m benchmarks.bench_primitives
+"""
+import os
+import timeit
+
+from eth_utils.conversions import to_int
+
+from eip712_structs import Address, Boolean, EIP712Struct, Int, Uint
+
+
+class LegacyUint(Uint):
+    def _encode_value(self, value):
+        value.to_bytes(self.length // 8, byteorder='big', signed=False)  # For validation
+        return value.to_bytes(32, byteorder='big', signed=False)
+
+
+class LegacyInt(Int):
+    def _encode_value(self, value):
+        value.to_bytes(self.length // 8, byteorder='big', signed=True)  # For validation
+        return value.to_bytes(32, byteorder='big', signed=True)
+
+
+class LegacyAddress(Address):
+    def _encode_value(self, value):
+        if isinstance(value, bytes):
+            v = to_int(value)
+        elif isinstance(value, str):
+            v = to_int(hexstr=value)
+        else:
+            v = value
+        return LegacyUint(160).encode_value(v)
+
+
+class LegacyBoolean(Boolean):
+    def _encode_value(self, value):
+        if value is False:
+            return LegacyUint(256).encode_value(0)
+        elif value is True:
+            return LegacyUint(256).encode_value(1)
+        else:
+            raise ValueError(f'Must be True or False. Got: {value}')
+
+
+def make_order_struct(address, uint, int_, boolean):
+    class Order(EIP712Struct):
+        maker = address()
+        taker = address()
+        token_a = address()
+        token_b = address()
+        amount_a = uint(256)
+        amount_b = uint(256)
+        fee = uint(128)
+        slippage = int_(64)
+        expiry = uint(64)
+        partial = boolean()
+    return Order
+
+
+def compare(label, legacy, current, number):
+    legacy_time = timeit.timeit(legacy, number=number)
+    current_time = timeit.timeit(current, number=number)
+    print(f'{label:<20} legacy {number / legacy_time:>12,.0f} ops/s   '
+          f'current {number / current_time:>12,.0f} ops/s   speedup {legacy_time / current_time:5.2f}x')
+
+
+def compare_encoders(label, legacy_type, current_type, value, number):
+    assert legacy_type.encode_value(value) == current_type.encode_value(value)
+    compare(label, lambda: legacy_type.encode_value(value), lambda: current_type.encode_value(value), number)
+
+
+def main(number=100000):
+    raw_address = os.urandom(20)
+    hex_address = '0x' + os.urandom(20).hex()
+
+    compare_encoders('address (bytes)', LegacyAddress(), Address(), raw_address, number)
+    compare_encoders('address (hex)', LegacyAddress(), Address(), hex_address, number)
+    compare_encoders('uint256', LegacyUint(256), Uint(256), 123456789, number)
+    compare_encoders('uint64', LegacyUint(64), Uint(64), 1700000000, number)
+    compare_encoders('int64', LegacyInt(64), Int(64), -12345, number)
+    compare_encoders('bool', LegacyBoolean(), Boolean(), True, number)
+
+    values = dict(maker=hex_address, taker=raw_address, token_a=hex_address, token_b=raw_address,
+                  amount_a=10 ** 24, amount_b=10 ** 20, fee=300, slippage=-5, expiry=1700000000, partial=True)
+    legacy_order = make_order_struct(LegacyAddress, LegacyUint, LegacyInt, LegacyBoolean)
+    current_order = make_order_struct(Address, Uint, Int, Boolean)
+    assert legacy_order(**values).encode_value() == current_order(**values).encode_value()
+    # Fresh instances each time, since instances cache their member encodings
+    compare('order struct', lambda: legacy_order(**values).encode_value(),
+            lambda: current_order(**values).encode_value(), number // 10)
+
+
+if __name__ == '__main__':
+    main()
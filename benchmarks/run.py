@@ -0,0 +1,134 @@
+"""Run the benchmark suite, and optionally compare the results against a stored baseline.
+
+For each workload (see ``benchmarks.workloads``), reports throughput in operations per second (the best of several
+repeats) and the peak memory allocated by a single operation.
+
+Usage:
+    python -m benchmarks.run                           # Run everything
+    python -m benchmarks.run -k permit -k mail         # Only workloads whose name contains one of these
+    python -m benchmarks.run --save baseline.json      # Store the results as a baseline
+    python -m benchmarks.run --compare baseline.json   # Exit with status 1 if any workload got slower
+    python -m benchmarks.run --compare baseline.json --threshold 0.25
+
+A workload counts as a regression when its throughput drops by more than ``--threshold`` (a fraction) compared to the
+baseline. Baselines are only meaningful on the machine they were recorded on.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.workloads import WORKLOADS, Workload
+
+SEED = 712
+BASELINE_VERSION = 1
+
+
+def measure_throughput(fn, repeat: int, min_time: float) -> float:
+    """Operations per second: the best of ``repeat`` runs, each long enough to last about ``min_time`` seconds."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return number / best
+
+
+def measure_allocations(fn, number: int = 5) -> float:
+    """The average peak memory allocated by a single call, in bytes."""
+    total = 0
+    for _ in range(number):
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        total += peak
+    return total / number
+
+
+def run_workload(workload: Workload, repeat: int, min_time: float) -> Dict[str, float]:
+    fn = workload.setup(random.Random(SEED))
+    fn()  # Warm up class-level caches
+    return {
+        'ops_per_sec': measure_throughput(fn, repeat, min_time),
+        'peak_bytes': measure_allocations(fn),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Returns the names of the workloads whose throughput dropped by more than ``threshold`` from the baseline."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['ops_per_sec'] / baseline[name]['ops_per_sec']
+        if ratio < 1 - threshold:
+            regressions.append(name)
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != BASELINE_VERSION:
+        raise ValueError(f'Unsupported baseline version in {path}: {data.get("version")}')
+    return data['results']
+
+
+def save_baseline(path: str, results: Dict[str, Dict]):
+    data = {
+        'version': BASELINE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def format_row(name: str, result: Dict[str, float], baseline: Dict[str, Dict], threshold: float) -> str:
+    row = f'{name:<26} {result["ops_per_sec"]:>14,.1f} ops/s {result["peak_bytes"]:>14,.0f} bytes/op'
+    if name in baseline:
+        ratio = result['ops_per_sec'] / baseline[name]['ops_per_sec']
+        flag = '  REGRESSION' if ratio < 1 - threshold else ''
+        row += f'   {ratio - 1:>+7.1%} vs baseline{flag}'
+    return row
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Run the eip712_structs benchmark suite.')
+    parser.add_argument('-k', dest='filters', action='append', default=[],
+                        help='Only run workloads whose name contains this string. May be given more than once.')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per workload. The best one is kept.')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum duration of each timing run, in seconds.')
+    parser.add_argument('--save', metavar='PATH', help='Write the results to a baseline JSON file.')
+    parser.add_argument('--compare', metavar='PATH', help='Compare the results against a baseline JSON file.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Allowed drop in throughput before a workload counts as a regression. Default: 0.1')
+    args = parser.parse_args(argv)
+
+    workloads = [w for w in WORKLOADS if not args.filters or any(f in w.name for f in args.filters)]
+    baseline = load_baseline(args.compare) if args.compare else {}
+
+    results = dict()
+    for workload in workloads:
+        result = results[workload.name] = run_workload(workload, args.repeat, args.min_time)
+        print(format_row(workload.name, result, baseline, args.threshold), flush=True)
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f'\nSaved baseline to {args.save}')
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} workload(s) regressed by more than {args.threshold:.0%}: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
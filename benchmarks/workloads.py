@@ -0,0 +1,202 @@
+"""Representative workloads for the benchmark suite, with reproducible data.
+
+Every workload builds its data from a ``random.Random`` seeded by the runner, so runs are comparable across machines
+and commits. ``setup(rng)`` does all the preparation, and returns the function to time - a single operation.
+"""
+import json
+import random
+from typing import Callable, List, NamedTuple
+
+from eip712_structs import Address, Array, Bytes, EIP712Struct, String, Uint, make_domain
+
+
+class Workload(NamedTuple):
+    name: str
+    description: str
+    setup: Callable[[random.Random], Callable[[], object]]
+
+
+# Struct definitions
+
+class Permit(EIP712Struct):
+    owner = Address()
+    spender = Address()
+    value = Uint(256)
+    nonce = Uint(256)
+    deadline = Uint(256)
+
+
+class Person(EIP712Struct):
+    name = String()
+    wallets = Array(Address())
+
+
+class Mail(EIP712Struct):
+    source = Person
+    dest = Person
+    contents = String()
+
+
+class Group(EIP712Struct):
+    name = String()
+    members = Array(Person)
+
+
+class Item(EIP712Struct):
+    token = Address()
+    amount = Uint(256)
+
+
+class Basket(EIP712Struct):
+    owner = Address()
+    items = Array(Item)
+
+
+class Upload(EIP712Struct):
+    name = String()
+    payload = Bytes()
+
+
+# Fixed-seed data generators
+
+def make_address(rng: random.Random) -> bytes:
+    return rng.getrandbits(160).to_bytes(20, 'big')
+
+
+def make_hex_address(rng: random.Random) -> str:
+    return '0x' + make_address(rng).hex()
+
+
+def make_text(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz ') for _ in range(length))
+
+
+def make_domain_struct(rng: random.Random):
+    return make_domain(name='Benchmark', version='1', chainId=1, verifyingContract=make_hex_address(rng))
+
+
+def make_permit_values(rng: random.Random) -> dict:
+    return {
+        'owner': make_hex_address(rng),
+        'spender': make_hex_address(rng),
+        'value': rng.getrandbits(128),
+        'nonce': rng.randrange(1000),
+        'deadline': 1700000000 + rng.randrange(10 ** 6),
+    }
+
+
+def make_person_values(rng: random.Random) -> dict:
+    return {'name': make_text(rng, 12), 'wallets': [make_address(rng) for _ in range(rng.randrange(1, 4))]}
+
+
+def make_mail_values(rng: random.Random) -> dict:
+    return {'source': make_person_values(rng), 'dest': make_person_values(rng), 'contents': make_text(rng, 200)}
+
+
+def make_basket_values(rng: random.Random, size: int) -> dict:
+    items = [{'token': make_address(rng), 'amount': rng.getrandbits(96)} for _ in range(size)]
+    return {'owner': make_address(rng), 'items': items}
+
+
+# Workloads. Structs are built fresh for each operation where it matters, since instances cache their hash.
+
+def cycle(values: List):
+    """A function returning the given values in turn, forever."""
+    state = {'i': -1}
+
+    def next_value():
+        state['i'] = (state['i'] + 1) % len(values)
+        return values[state['i']]
+    return next_value
+
+
+def setup_permit_hash(rng):
+    next_values = cycle([make_permit_values(rng) for _ in range(100)])
+    return lambda: Permit(**next_values()).hash_struct()
+
+
+def setup_permit_compiled(rng):
+    next_values = cycle([make_permit_values(rng) for _ in range(100)])
+    hash_struct = Permit.compile().hash_struct
+    return lambda: hash_struct(next_values())
+
+
+def setup_permit_signable_bytes(rng):
+    domain = make_domain_struct(rng)
+    next_values = cycle([make_permit_values(rng) for _ in range(100)])
+    return lambda: Permit(**next_values()).signable_bytes(domain)
+
+
+def setup_mail_hash(rng):
+    next_values = cycle([make_mail_values(rng) for _ in range(100)])
+    return lambda: Mail(**next_values()).hash_struct()
+
+
+def setup_mail_encode_type(rng):
+    return Mail.encode_type
+
+
+def setup_group_hash(rng):
+    values = {'name': 'group', 'members': [make_person_values(rng) for _ in range(10)]}
+    return lambda: Group(name=values['name'], members=[Person(**p) for p in values['members']]).hash_struct()
+
+
+def setup_basket_hash(size):
+    def setup(rng):
+        values = make_basket_values(rng, size)
+        return lambda: Basket(owner=values['owner'], items=[Item(**i) for i in values['items']]).hash_struct()
+    return setup
+
+
+def setup_basket_compiled(size):
+    def setup(rng):
+        values = make_basket_values(rng, size)
+        hash_struct = Basket.compile().hash_struct
+        return lambda: hash_struct(values)
+    return setup
+
+
+def setup_large_bytes(rng):
+    values = {'name': 'upload', 'payload': bytes(rng.getrandbits(8) for _ in range(1 << 20))}
+    return lambda: Upload(**values).hash_struct()
+
+
+def setup_to_message_json(rng):
+    domain = make_domain_struct(rng)
+    next_mail = cycle([Mail(**make_mail_values(rng)) for _ in range(100)])
+    return lambda: next_mail().to_message_json(domain)
+
+
+def setup_from_message(rng):
+    domain = make_domain_struct(rng)
+    messages = [json.loads(Mail(**make_mail_values(rng)).to_message_json(domain)) for _ in range(100)]
+    next_message = cycle(messages)
+    return lambda: EIP712Struct.from_message(next_message()).message.hash_struct()
+
+
+def setup_message_round_trip(rng):
+    domain = make_domain_struct(rng)
+    next_mail = cycle([Mail(**make_mail_values(rng)) for _ in range(100)])
+
+    def round_trip():
+        result = EIP712Struct.from_message(json.loads(next_mail().to_message_json(domain)))
+        return result.message.signable_bytes(result.domain)
+    return round_trip
+
+
+WORKLOADS = [
+    Workload('permit.hash_struct', 'Flat Permit struct, built and hashed', setup_permit_hash),
+    Workload('permit.compiled', 'Flat Permit values dict, compiled hash', setup_permit_compiled),
+    Workload('permit.signable_bytes', 'Flat Permit struct, built and signed', setup_permit_signable_bytes),
+    Workload('mail.hash_struct', 'Nested Mail/Person structs, built and hashed', setup_mail_hash),
+    Workload('mail.encode_type', 'Encoded type of the nested Mail struct', setup_mail_encode_type),
+    Workload('group.hash_struct', 'Struct with an array of 10 nested structs', setup_group_hash),
+    Workload('basket_1k.hash_struct', 'Array of 1,000 structs, built and hashed', setup_basket_hash(1000)),
+    Workload('basket_1k.compiled', 'Array of 1,000 structs, compiled hash', setup_basket_compiled(1000)),
+    Workload('basket_10k.hash_struct', 'Array of 10,000 structs, built and hashed', setup_basket_hash(10000)),
+    Workload('basket_10k.compiled', 'Array of 10,000 structs, compiled hash', setup_basket_compiled(10000)),
+    Workload('bytes_1mb.hash_struct', 'Struct with 1 MiB of dynamic bytes', setup_large_bytes),
+    Workload('mail.to_message_json', 'Nested Mail struct to message JSON', setup_to_message_json),
+    Workload('mail.from_message', 'Nested Mail struct from a message dict, and hashed', setup_from_message),
+    Workload('mail.round_trip', 'Mail to JSON, back with from_message, and signed', setup_message_round_trip),
+]
@@ -1,5 +1,5 @@
 from eip712_structs.domain_separator import make_domain
 from eip712_structs.struct import EIP712Struct
-from eip712_structs.types import Address, Array, Boolean, Bytes, Int, String, Uint
+from eip712_structs.types import Address, Array, ArrayValue, Boolean, Bytes, Int, String, Uint
 
 default_domain = None
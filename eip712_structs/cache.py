@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """A small, thread-safe, bounded least-recently-used cache, with hit/miss counters.
+
+    A ``maxsize`` of 0 disables the cache: nothing is stored, and every lookup is a miss.
+
+    Example:
+        cache = LRUCache(maxsize=1024)
+        cache.put('key', 'value')
+        assert cache.get('key') == 'value'
+        cache.stats()  # {'size': 1, 'maxsize': 1024, 'hits': 1, 'misses': 0}
+    """
+    def __init__(self, maxsize: int = 128):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = self._check_size(maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _check_size(maxsize) -> int:
+        maxsize = int(maxsize)
+        if maxsize < 0:
+            raise ValueError(f'Cache size must not be negative. Got: {maxsize}')
+        return maxsize
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for the key (marking it as recently used), or ``default`` if not present."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if the cache is full."""
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove the key from the cache, returning its value (or ``default`` if not present)."""
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def resize(self, maxsize: int):
+        """Change the maximum number of entries, evicting the least recently used entries as needed."""
+        maxsize = self._check_size(maxsize)
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries, and reset the hit/miss counters."""
+        with self._lock:
+            self._data.clear()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the hit/miss counters, keeping the cached entries."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """A snapshot of the cache's size and hit/miss counters."""
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
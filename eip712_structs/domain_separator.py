@@ -1,33 +1,80 @@
+import threading
+
 import eip712_structs
+from eip712_structs.cache import LRUCache
+
+# Domains previously built by make_domain, keyed on the (normalized) arguments.
+domain_cache = LRUCache(maxsize=256)
+
+# The EIP712Domain members, in the order the standard defines them.
+_domain_fields = (
+    ('name', lambda: eip712_structs.String()),
+    ('version', lambda: eip712_structs.String()),
+    ('chainId', lambda: eip712_structs.Uint(256)),
+    ('verifyingContract', lambda: eip712_structs.Address()),
+    ('salt', lambda: eip712_structs.Bytes(32)),
+)
+
+# One EIP712Domain class per combination of used fields, built on first use.
+_domain_classes = dict()
+_domain_classes_lock = threading.Lock()
 
 
 def make_domain(name=None, version=None, chainId=None, verifyingContract=None, salt=None):
     """Helper method to create the standard EIP712Domain struct for you.
 
     Per the standard, if a value is not used then the parameter is omitted from the struct entirely.
+
+    Domains are cached (see ``domain_cache``), so calls with the same arguments return the same, pre-hashed instance.
+    Treat the result as read-only - a cached domain that was modified is replaced on the next call.
     """
 
     if all(i is None for i in [name, version, chainId, verifyingContract, salt]):
         raise ValueError('At least one argument must be given.')
 
-    class EIP712Domain(eip712_structs.EIP712Struct):
-        pass
-
     kwargs = dict()
     if name is not None:
-        EIP712Domain.name = eip712_structs.String()
         kwargs['name'] = str(name)
     if version is not None:
-        EIP712Domain.version = eip712_structs.String()
         kwargs['version'] = str(version)
     if chainId is not None:
-        EIP712Domain.chainId = eip712_structs.Uint(256)
         kwargs['chainId'] = int(chainId)
     if verifyingContract is not None:
-        EIP712Domain.verifyingContract = eip712_structs.Address()
         kwargs['verifyingContract'] = verifyingContract
     if salt is not None:
-        EIP712Domain.salt = eip712_structs.Bytes(32)
         kwargs['salt'] = salt
 
-    return EIP712Domain(**kwargs)
+    cache_key = tuple(kwargs.items())
+    try:
+        domain = domain_cache.get(cache_key)
+    except TypeError:
+        # Unhashable values (e.g. a bytearray salt) can't be cached
+        return _get_domain_class(tuple(kwargs))(**kwargs)
+
+    if domain is None or domain.values != kwargs:
+        domain = _get_domain_class(tuple(kwargs))(**kwargs)
+        domain.hash_struct()  # Pre-hash, so the first signature doesn't pay for it
+        domain_cache.put(cache_key, domain)
+    return domain
+
+
+def _get_domain_class(field_names):
+    """Get the EIP712Domain class containing exactly the given fields, creating it only once."""
+    domain_class = _domain_classes.get(field_names)
+    if domain_class is None:
+        with _domain_classes_lock:
+            domain_class = _domain_classes.get(field_names)
+            if domain_class is None:
+                domain_class = _domain_classes[field_names] = _build_domain_class(field_names)
+    return domain_class
+
+
+def _build_domain_class(field_names):
+    class EIP712Domain(eip712_structs.EIP712Struct):
+        __slots__ = ()
+
+    for field_name, make_type in _domain_fields:
+        if field_name in field_names:
+            setattr(EIP712Domain, field_name, make_type())
+
+    return EIP712Domain
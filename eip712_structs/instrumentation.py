@@ -0,0 +1,255 @@
+"""Optional instrumentation of the hot paths: call counts, cumulative time, bytes hashed and cache statistics.
+
+Instrumentation is off by default, and costs nothing while it's off: ``enable()`` swaps timing wrappers in for the
+instrumented functions, and ``disable()`` puts the originals back.
+
+Example:
+    from eip712_structs import instrumentation
+
+    with instrumentation.profiling() as profile:
+        for message in messages:
+            EIP712Struct.from_message(message).message.hash_struct()
+    profile.snapshot()  # {'operations': {'struct.hash_struct': {'calls': ..., 'seconds': ...}, ...}, ...}
+
+Times are inclusive, and recursive calls (like nested structs hashing their members) are counted individually.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from eip712_structs import compiled, domain_separator, jsonl, struct, types
+
+_lock = threading.Lock()
+
+# Operation name -> [calls, cumulative seconds]
+_operations = dict()
+_keccak = {'calls': 0, 'bytes': 0}
+
+# (owner, attribute name, original value) for everything replaced by enable(), so disable() can restore it
+_originals = list()
+
+# The instrumented methods, as (operation name, class, method name)
+_instrumented_methods = [
+    ('struct.hash_struct', struct.EIP712Struct, 'hash_struct'),
+    ('struct.encode_members', struct.EIP712Struct, '_encode_members'),
+    ('struct.encode_type', struct.EIP712Struct, 'encode_type'),
+    ('struct.type_hash', struct.EIP712Struct, 'type_hash'),
+    ('struct.signable_bytes', struct.EIP712Struct, 'signable_bytes'),
+    ('struct.to_message', struct.EIP712Struct, 'to_message'),
+    ('struct.to_message_json', struct.EIP712Struct, 'to_message_json'),
+    ('struct.from_message', struct.EIP712Struct, 'from_message'),
+    ('struct.build_classes', struct.EIP712Struct, '_structs_from_types'),
+    ('type.encode_value', types.EIP712Type, 'encode_value'),
+    ('compiled.hash_struct', compiled.CompiledStruct, 'hash_struct'),
+]
+
+# Module-level references to the hash functions, as (module, name). Incremental hashers are covered by _new_keccak.
+_hash_functions = [
+    (types, 'keccak'),
+    (types, 'keccak256'),
+    (struct, 'keccak'),
+    (struct, 'keccak256'),
+    (compiled, 'keccak'),
+    (jsonl, 'keccak'),
+]
+
+
+def _caches() -> dict:
+    return {
+        'address_cache': types.address_cache,
+        'content_hash_cache': types.content_hash_cache,
+        'message_struct_cache': struct.message_struct_cache,
+        'domain_cache': domain_separator.domain_cache,
+    }
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def enable():
+    """Start collecting counters. Does nothing if instrumentation is already enabled."""
+    with _lock:
+        if _originals:
+            return
+        for op, owner, name in _instrumented_methods:
+            original = owner.__dict__[name]
+            _replace(owner, name, _timed(original, _operations.setdefault(op, [0, 0.0])))
+        for module, name in _hash_functions:
+            _replace(module, name, _counting_hash(getattr(module, name)))
+        _replace(types, '_new_keccak', _counting_hasher_factory(types._new_keccak))
+
+
+def disable():
+    """Stop collecting counters, restoring the original functions. The counters are kept until ``reset()``."""
+    with _lock:
+        while _originals:
+            owner, name, original = _originals.pop()
+            _set(owner, name, original)
+
+
+def reset():
+    """Zero all counters, including the hit/miss counters of the caches."""
+    with _lock:
+        for counter in _operations.values():
+            counter[0] = 0
+            counter[1] = 0.0
+        _keccak['calls'] = 0
+        _keccak['bytes'] = 0
+    for cache in _caches().values():
+        cache.reset_stats()
+
+
+def snapshot() -> dict:
+    """The current counters, as plain data ready to be exported.
+
+    Returned as a dictionary of the form:
+        {
+            'enabled': True,
+            'operations': {'struct.hash_struct': {'calls': 10, 'seconds': 0.0012}, ...},
+            'keccak': {'calls': 20, 'bytes': 1920},
+            'caches': {'address_cache': {'size': 0, 'maxsize': 0, 'hits': 0, 'misses': 0}, ...},
+        }
+    """
+    with _lock:
+        operations = {op: {'calls': calls, 'seconds': seconds}
+                      for op, (calls, seconds) in sorted(_operations.items()) if calls}
+        keccak = dict(_keccak)
+    return {
+        'enabled': is_enabled(),
+        'operations': operations,
+        'keccak': keccak,
+        'caches': {name: cache.stats() for name, cache in _caches().items()},
+    }
+
+
+class Profile:
+    """The counters collected within a ``profiling()`` block. See ``snapshot()``."""
+    def __init__(self):
+        self._start = snapshot()
+        self._end = None
+
+    def _stop(self):
+        self._end = snapshot()
+
+    def snapshot(self) -> dict:
+        """Like the module's ``snapshot()``, but only counting what happened within the block (so far)."""
+        start = self._start
+        end = self._end or snapshot()
+
+        operations = dict()
+        for op, counter in end['operations'].items():
+            before = start['operations'].get(op, {'calls': 0, 'seconds': 0.0})
+            calls = counter['calls'] - before['calls']
+            if calls:
+                operations[op] = {'calls': calls, 'seconds': counter['seconds'] - before['seconds']}
+
+        caches = dict()
+        for name, stats in end['caches'].items():
+            stats = dict(stats)
+            for key in ('hits', 'misses'):
+                stats[key] = max(0, stats[key] - start['caches'][name][key])
+            caches[name] = stats
+
+        return {
+            'enabled': end['enabled'],
+            'operations': operations,
+            'keccak': {key: end['keccak'][key] - start['keccak'][key] for key in end['keccak']},
+            'caches': caches,
+        }
+
+
+@contextmanager
+def profiling() -> Iterator[Profile]:
+    """Enable instrumentation within a block, and collect the counters for it.
+
+    If instrumentation was already enabled, it's left enabled afterwards.
+    """
+    was_enabled = is_enabled()
+    enable()
+    profile = Profile()
+    try:
+        yield profile
+    finally:
+        profile._stop()
+        if not was_enabled:
+            disable()
+
+
+def _replace(owner, name, value):
+    _originals.append((owner, name, owner.__dict__[name]))
+    _set(owner, name, value)
+
+
+def _set(owner, name, value):
+    if isinstance(owner, type):
+        # Bypasses the metaclass of struct classes, which would drop their caches
+        type.__setattr__(owner, name, value)
+    else:
+        setattr(owner, name, value)
+
+
+def _timed(original, counter):
+    """Wrap a function, classmethod or staticmethod to count its calls and time in the given counter."""
+    if isinstance(original, (classmethod, staticmethod)):
+        return type(original)(_timed(original.__func__, counter))
+
+    perf_counter = time.perf_counter
+
+    @functools.wraps(original)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            with _lock:
+                counter[0] += 1
+                counter[1] += elapsed
+    return timed
+
+
+def _hashed_size(args, kwargs) -> int:
+    data = args[0] if args else kwargs.get('primitive', kwargs.get('text', kwargs.get('hexstr', b'')))
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+def _counting_hash(original):
+    @functools.wraps(original)
+    def counting_hash(*args, **kwargs):
+        size = _hashed_size(args, kwargs)
+        with _lock:
+            _keccak['calls'] += 1
+            _keccak['bytes'] += size
+        return original(*args, **kwargs)
+    return counting_hash
+
+
+class _CountingHasher:
+    """Wraps an incremental hasher, counting the bytes fed to it."""
+    __slots__ = ('_hasher',)
+
+    def __init__(self, hasher):
+        self._hasher = hasher
+
+    def update(self, data):
+        with _lock:
+            _keccak['bytes'] += len(data)
+        self._hasher.update(data)
+
+    def digest(self) -> bytes:
+        with _lock:
+            _keccak['calls'] += 1
+        return self._hasher.digest()
+
+
+def _counting_hasher_factory(original):
+    @functools.wraps(original)
+    def new_keccak():
+        return _CountingHasher(original())
+    return new_keccak
@@ -0,0 +1,148 @@
+import io
+import json
+import os
+from typing import IO, Iterable, Iterator, Union
+
+from eth_hash.auto import keccak
+
+from eip712_structs import struct
+from eip712_structs.struct import EIP712Struct, StructTuple
+
+Source = Union[str, os.PathLike, IO, Iterable[Union[str, bytes]]]
+Destination = Union[str, os.PathLike, IO]
+
+# What a header line written by write_messages holds (and a message line then doesn't)
+_header_keys = ('primaryType', 'types', 'domain')
+
+
+def iter_messages(source: Source, digests: bool = False) -> Iterator[Union[StructTuple, bytes]]:
+    """Lazily read EIP712 messages from a JSON-lines source, one JSON message document per line.
+
+    Struct classes are only built once for each distinct ``types`` section, and shared by every message using it
+    (see ``EIP712Struct.from_message``).
+    Blank lines are skipped. Files written by ``write_messages`` with a header line are supported too.
+
+    Example:
+        for message, domain in iter_messages('signed_orders.jsonl'):
+            ...
+
+    :param source: A file path, an open (text or binary) file, or any iterable of lines.
+    :param digests: If True, yield each message's digest instead of its structs: the keccak256 hash of its
+        ``signable_bytes``, which is what gets signed (and what ``write_messages`` writes). Structs aren't built.
+    :return: An iterator over ``StructTuple``s (or ``bytes`` objects, if ``digests`` is set).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_messages(f, digests)
+        return
+
+    header = None
+    for line in source:
+        if not line.strip():
+            continue
+        message_dict = json.loads(line)
+        if 'message' not in message_dict:
+            # A header line, holding what the following lines have in common
+            missing = [key for key in _header_keys if key not in message_dict]
+            if missing:
+                raise ValueError(f'Expected a message, or a header line with {", ".join(_header_keys)}. '
+                                 f'Missing: {", ".join(missing)}')
+            header = message_dict
+            continue
+        if header is not None:
+            message_dict = dict(header, **message_dict)
+        structs = EIP712Struct._get_message_structs(message_dict['types'])
+        primary_struct = structs[message_dict['primaryType']]
+        domain_struct = structs['EIP712Domain']
+
+        if digests:
+            domain_hash = domain_struct.compile().hash_struct(message_dict['domain'])
+            yield keccak(b'\x19\x01' + domain_hash + primary_struct.compile().hash_struct(message_dict['message']))
+        else:
+            yield StructTuple(message=primary_struct(**message_dict['message']),
+                              domain=domain_struct(**message_dict['domain']))
+
+
+def write_messages(destination: Destination, messages: Iterable[EIP712Struct], domain: EIP712Struct = None,
+                   header: bool = False, digests: bool = False, buffer_size: int = 1 << 16) -> int:
+    """Write structs as EIP712 messages in JSON-lines format, one message document per line.
+
+    Messages are serialized one at a time and written in batches of about ``buffer_size`` bytes, so any number of
+    them may be written in constant memory. The JSON encoder is chosen with ``eip712_structs.struct.set_json_backend``,
+    and must write each object on a single line (without indentation, or a trailing newline).
+
+    Example:
+        write_messages('signed_orders.jsonl', orders, domain, header=True, digests=True)
+
+    :param destination: A file path (overwritten), or an open file. Binary and text files are both supported.
+    :param messages: The structs to write. Read lazily, in a single pass.
+    :param domain: The domain of every message. If None, uses ``eip712_structs.default_domain``
+    :param header: If True, the ``primaryType``, ``types`` and ``domain`` are written once, in a first header line, and
+        every following line only holds its ``message``. Merging the header into a line gives back the full message
+        document. All messages must then be of the same struct class. ``iter_messages`` reads either format.
+    :param digests: If True, each line also gets a ``digest``: the hex encoded keccak256 hash of the message's
+        ``signable_bytes``, which is what gets signed.
+    :return: The number of messages written.
+    """
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, 'wb') as f:
+            return write_messages(f, messages, domain, header, digests, buffer_size)
+
+    domain = EIP712Struct._assert_domain(domain)
+    domain_prefix = b'\x19\x01' + domain.hash_struct()
+    domain_data = domain._json_data()
+    is_text = isinstance(destination, io.TextIOBase)
+
+    pending = list()
+    pending_size = 0
+    count = 0
+    struct_class = None
+    line_prefix = None
+    for message in messages:
+        if type(message) is not struct_class:
+            if header and struct_class is not None:
+                raise ValueError(f'With a header, all messages must be {struct_class.type_name} structs. '
+                                 f'Got: {message.type_name}')
+            struct_class = type(message)
+            common = {'primaryType': struct_class.type_name,
+                      'types': struct_class._message_types(type(domain)),
+                      'domain': domain_data}
+            if header:
+                header_line = _json_line(common) + '\n'
+                pending.append(header_line)
+                pending_size += len(header_line)
+                line_prefix = '{"message": '
+            else:
+                # The shared part of each line, serialized once: the document without its closing brace
+                line_prefix = _json_line(common)[:-1] + ', "message": '
+
+        line = line_prefix + _json_line(message._json_data())
+        if digests:
+            line += ', "digest": "0x' + keccak(domain_prefix + message.hash_struct()).hex() + '"'
+        line += '}\n'
+        pending.append(line)
+        pending_size += len(line)
+        count += 1
+
+        if pending_size >= buffer_size:
+            _write_lines(destination, pending, is_text)
+            pending = list()
+            pending_size = 0
+
+    if pending:
+        _write_lines(destination, pending, is_text)
+    return count
+
+
+def _json_line(obj: dict) -> str:
+    """Serialize a dictionary with the chosen JSON backend, checking that it's a single line ending in its brace."""
+    text = struct._json_dumps(obj)
+    if '\n' in text or not text.endswith('}'):
+        raise ValueError('JSON-lines output needs a compact JSON backend, writing each object on a single line. '
+                         'See eip712_structs.struct.set_json_backend')
+    return text
+
+
+def _write_lines(destination, lines, is_text):
+    data = ''.join(lines)
+    destination.write(data if is_text else data.encode('utf-8'))
@@ -0,0 +1,129 @@
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Union
+
+from eip712_structs.cache import LRUCache
+from eip712_structs.struct import EIP712Struct, _gather_all_structs
+from eip712_structs.types import ArrayValue
+
+
+class StructSchema(NamedTuple):
+    """A picklable description of a struct class, in the same form as a message's ``types`` section.
+
+    Lets worker processes rebuild a struct class without importing the module that defined it.
+
+    Example:
+        schema = StructSchema.from_struct(Order)
+        OrderCopy = schema.to_struct()
+        assert OrderCopy.type_hash() == Order.type_hash()
+    """
+    primary_type: str
+    types: Dict[str, List[Dict[str, str]]]
+
+    @classmethod
+    def from_struct(cls, struct_class) -> 'StructSchema':
+        structs = set()
+        _gather_all_structs(struct_class, structs)
+        return cls(primary_type=struct_class.type_name, types=EIP712Struct._types_section(structs))
+
+    def key(self) -> str:
+        """A canonical string form of the schema, suitable as a cache key."""
+        return json.dumps([self.primary_type, self.types], sort_keys=True)
+
+    def to_struct(self):
+        """Rebuild the primary struct class. Each process only rebuilds a given schema once."""
+        key = self.key()
+        struct_class = rebuilt_struct_cache.get(key)
+        if struct_class is None:
+            struct_class = EIP712Struct._structs_from_types(self.types)[self.primary_type]
+            rebuilt_struct_cache.put(key, struct_class)
+        return struct_class
+
+
+# Struct classes rebuilt from a StructSchema in this process, keyed on StructSchema.key()
+rebuilt_struct_cache = LRUCache(maxsize=128)
+
+
+def _hash_chunk(schema: StructSchema, prefix: bytes, chunk: List[Mapping]) -> List[bytes]:
+    """Worker entry point: hash a chunk of value dicts."""
+    hash_struct = schema.to_struct().compile().hash_struct
+    return [prefix + hash_struct(values) for values in chunk]
+
+
+def hash_parallel(struct_class, items: Iterable[Union[Mapping, EIP712Struct]], chunk_size: int = 1000,
+                  max_workers: Optional[int] = None, executor: Optional[Executor] = None) -> Iterator[bytes]:
+    """Compute ``hash_struct`` for a large number of messages across a pool of worker processes.
+
+    Items are sent to workers in chunks, and results are yielded in the same order as the items are given.
+    Only a bounded number of chunks are in flight at once, so arbitrarily large (or lazy) iterables may be used.
+
+    :param struct_class: The struct type of every item.
+    :param items: Value dictionaries and/or instances of ``struct_class``. Values must be picklable.
+    :param chunk_size: The number of items sent to a worker at a time.
+    :param max_workers: Size of the process pool. Defaults to the number of CPUs.
+    :param executor: An existing executor to use instead of creating a new process pool. It isn't shut down.
+    :return: An iterator over the struct hashes.
+    """
+    _check_chunk_size(chunk_size)
+    return _hash_in_pool(struct_class, items, b'', chunk_size, max_workers, executor)
+
+
+def signable_bytes_parallel(struct_class, items: Iterable[Union[Mapping, EIP712Struct]],
+                            domain: EIP712Struct = None, chunk_size: int = 1000, max_workers: Optional[int] = None,
+                            executor: Optional[Executor] = None) -> Iterator[bytes]:
+    """Compute ``signable_bytes`` for a large number of messages across a pool of worker processes.
+
+    Works like ``hash_parallel``. The domain separator is computed once, up front.
+
+    :param domain: The domain to include in the hash bytes. If None, uses ``eip712_structs.default_domain``
+    :return: An iterator over the signable bytes.
+    """
+    _check_chunk_size(chunk_size)
+    domain = EIP712Struct._assert_domain(domain)
+    prefix = b'\x19\x01' + domain.hash_struct()
+    return _hash_in_pool(struct_class, items, prefix, chunk_size, max_workers, executor)
+
+
+def _check_chunk_size(chunk_size):
+    # Checked before the (lazy) result generator is created, so bad arguments fail right away
+    if chunk_size < 1:
+        raise ValueError(f'Chunk size must be at least 1. Got: {chunk_size}')
+
+
+def _hash_in_pool(struct_class, items, prefix, chunk_size, max_workers, executor):
+    schema = StructSchema.from_struct(struct_class)
+    workers = max_workers or os.cpu_count() or 1
+
+    if executor is not None:
+        yield from _run_chunks(executor, schema, prefix, items, chunk_size, workers)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from _run_chunks(pool, schema, prefix, items, chunk_size, workers)
+
+
+def _run_chunks(executor, schema, prefix, items, chunk_size, workers):
+    iterator = iter(items)
+    pending = deque()
+    max_pending = 2 * workers
+
+    while True:
+        while len(pending) < max_pending:
+            chunk = [_as_plain_data(item) for item in itertools.islice(iterator, chunk_size)]
+            if not chunk:
+                break
+            pending.append(executor.submit(_hash_chunk, schema, prefix, chunk))
+        if not pending:
+            return
+        yield from pending.popleft().result()
+
+
+def _as_plain_data(value):
+    """Struct instances are sent to workers as plain (picklable) dicts, including those nested in lists."""
+    if isinstance(value, EIP712Struct):
+        return {k: _as_plain_data(v) for k, v in value.values.items()}
+    if isinstance(value, (list, tuple, ArrayValue)):
+        return [_as_plain_data(v) for v in value]
+    return value
@@ -1,23 +1,258 @@
+import copy
 import functools
 import json
 import operator
-import re
+import weakref
 from collections import OrderedDict, defaultdict
-from typing import List, Tuple, NamedTuple
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Tuple, NamedTuple, Union
 
+from eth_hash.auto import keccak as keccak256
 from eth_utils.crypto import keccak
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import eip712_structs
-from eip712_structs.types import Array, EIP712Type, from_solidity_type, BytesJSONEncoder
+from eip712_structs.cache import LRUCache
+from eip712_structs.types import (
+    Array, ArrayValue, EIP712Type, from_solidity_type, is_stream, parse_type_string, wrap_in_arrays
+)
 
 
 class OrderedAttributesMeta(type):
     """Metaclass to ensure struct attribute order is preserved.
+
+    Also drops the class's cached member schema whenever an attribute is set or deleted on the class,
+    e.g. when members are added dynamically with ``setattr``.
     """
     @classmethod
     def __prepare__(mcs, name, bases):
         return OrderedDict()
 
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if name != _CACHE_ATTR:
+            cls._invalidate_cache()
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        if name != _CACHE_ATTR:
+            cls._invalidate_cache()
+
+
+# Name of the class attribute holding each struct class's private cache dictionary
+_CACHE_ATTR = '_struct_cache'
+
+# Struct classes built by from_message, keyed on the canonical JSON form of the message's types section
+message_struct_cache = LRUCache(maxsize=128)
+
+# Maps each struct class to the set of struct classes referencing it, so cache invalidation can propagate upwards
+_struct_referrers = weakref.WeakKeyDictionary()
+
+
+class _MemberSchema(NamedTuple):
+    """The compiled, immutable member layout of a struct class. Built once per class, and rebuilt on change."""
+    members: Tuple[Tuple[str, Any], ...]  # (name, type) pairs, in definition order
+    names: Tuple[str, ...]
+    types: Dict[str, Any]                  # name -> type
+    index: Dict[str, int]                  # name -> position
+    struct_flags: Tuple[bool, ...]         # True where the member is a nested struct
+    struct_types: Tuple[type, ...]         # The nested struct types, in definition order
+
+    @classmethod
+    def build(cls, struct_class) -> '_MemberSchema':
+        members = tuple((name, typ) for name, typ in struct_class.__dict__.items() if _is_member_type(typ))
+        clashes = [name for name, _ in members if name in _instance_attributes]
+        if clashes and not struct_class.__dictoffset__:
+            # The member hides the instance's slot of the same name, and there's no __dict__ to fall back on
+            raise TypeError(f'Struct {struct_class.__name__} declares __slots__, so it can not have members named '
+                            f'{", ".join(clashes)}. Remove its __slots__ declaration.')
+        struct_flags = tuple(_is_struct_type(typ) for _, typ in members)
+        for _, typ in members:
+            for referenced in _referenced_structs(typ):
+                _struct_referrers.setdefault(referenced, weakref.WeakSet()).add(struct_class)
+        return cls(
+            members=members,
+            names=tuple(name for name, _ in members),
+            types={name: typ for name, typ in members},
+            index={name: i for i, (name, _) in enumerate(members)},
+            struct_flags=struct_flags,
+            struct_types=tuple(typ for (_, typ), is_struct in zip(members, struct_flags) if is_struct),
+        )
+
+
+class _EncodingCache:
+    """Per-instance cache of each member's encoding, and of the struct's hash.
+
+    ``buffer`` holds the struct's full hash input (``type_hash || encode_data``), preallocated at 32 bytes per word.
+    It's the only copy of the member encodings: changed members are written into it in place, and it's hashed
+    directly without building intermediate bytes.
+    """
+    __slots__ = ('schema', 'values', 'buffer', 'type_hash', 'hash')
+
+    def __init__(self, schema: _MemberSchema):
+        self.schema = schema
+        self.values = [_UNCACHED] * len(schema.members)  # The value each member was last encoded from
+        self.buffer = bytearray(32 * (len(schema.members) + 1))
+        self.type_hash = None
+        self.hash = None
+
+
+# The attributes of struct instances. Members with these names hide them, so their classes need an instance __dict__.
+_instance_attributes = frozenset(['values', '_encoding_cache'])
+
+# Marks a member value that must be re-encoded
+_UNCACHED = object()
+
+# Values of these (immutable) types are only re-encoded when they are replaced.
+# Anything else, like lists for arrays, can change in place and is re-encoded every time.
+_immutable_value_types = frozenset([bytes, str, int, bool, type(None)])
+
+
+class FrozenDict(dict):
+    """A dict that can't be changed. Compares equal to (and serializes like) a regular dict."""
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} can not be changed. Make a copy first.')
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {k: copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    """A list that can't be changed. Compares equal to (and serializes like) a regular list."""
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} can not be changed. Make a copy first.')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _freeze(value):
+    """Recursively convert dicts and lists into their frozen counterparts."""
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(_freeze(v) for v in value)
+    return value
+
+
+def _is_struct_type(typ) -> bool:
+    return isinstance(typ, type) and issubclass(typ, EIP712Struct)
+
+
+def _is_member_type(typ) -> bool:
+    return isinstance(typ, EIP712Type) or _is_struct_type(typ)
+
+
+def _referenced_structs(typ):
+    """Yields the struct classes a member type depends on, including the element types of (nested) arrays."""
+    while isinstance(typ, Array):
+        typ = typ.member_type
+    if _is_struct_type(typ):
+        yield typ
+
+
+def _gather_all_structs(struct_class, struct_set):
+    """Like EIP712Struct._gather_reference_structs, but includes the given class and structs held in arrays."""
+    struct_set.add(struct_class)
+    for _, typ in struct_class._member_schema().members:
+        for struct in _referenced_structs(typ):
+            if struct not in struct_set:
+                _gather_all_structs(struct, struct_set)
+
+
+def _array_from_data(typ: Array, value: list) -> list:
+    """Build the struct instances for the dicts in an array of structs (like a message's data).
+
+    Other arrays are kept as they are.
+    """
+    member_type = typ.member_type
+    if isinstance(member_type, Array):
+        return [_array_from_data(member_type, v) if isinstance(v, list) else v for v in value]
+    if _is_struct_type(member_type):
+        return [member_type(**v) if isinstance(v, dict) else v for v in value]
+    return value
+
+
+def _data_value(value):
+    """Convert a member value for ``data_dict``: structs become dicts, including those held in arrays."""
+    if isinstance(value, EIP712Struct):
+        return value.data_dict()
+    if isinstance(value, (list, tuple, ArrayValue)):
+        return [_data_value(v) for v in value]
+    return value
+
+
+def _json_value(value):
+    """Convert a member value into data the JSON encoder handles natively: bytes become hex, structs become dicts."""
+    if type(value) in _json_native_types:
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + value.hex()
+    if isinstance(value, EIP712Struct):
+        return value._json_data()
+    if isinstance(value, (list, tuple, ArrayValue)):
+        return [_json_value(v) for v in value]
+    return value
+
+
+_json_native_types = frozenset([str, int, bool, type(None)])
+
+
+def _stdlib_json_dumps(obj) -> str:
+    return json.dumps(obj)
+
+
+def _orjson_dumps(obj) -> str:
+    try:
+        return orjson.dumps(obj).decode('utf-8')
+    except TypeError:
+        # orjson only supports 64-bit integers, uint256 values may need the standard library
+        return json.dumps(obj)
+
+
+# Serializes the (JSON-ready) message dictionary in to_message_json. See set_json_backend.
+_json_dumps = _stdlib_json_dumps
+
+
+def set_json_backend(backend: Union[str, Callable[[Any], str]]):
+    """Choose the JSON serializer used by ``EIP712Struct.to_message_json``.
+
+    :param backend: ``'json'`` for the standard library (the default), ``'orjson'`` to use orjson (if installed),
+        or any function turning a dictionary of plain JSON data into a string.
+    """
+    global _json_dumps
+    if backend == 'json':
+        _json_dumps = _stdlib_json_dumps
+    elif backend == 'orjson':
+        if orjson is None:
+            raise ValueError('The orjson backend requires the orjson package to be installed.')
+        _json_dumps = _orjson_dumps
+    elif callable(backend):
+        _json_dumps = backend
+    else:
+        raise ValueError(f'Unknown JSON backend: {backend}')
+
 
 class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
     """A representation of an EIP712 struct. Subclass it to use it.
@@ -29,21 +264,73 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
             some_param = String()
 
         struct_instance = MyStruct(some_param='some_value')
+
+    Instances keep their values in a ``values`` dict, which is their only per-instance state. Subclasses may declare
+    ``__slots__ = ()`` to drop the instance ``__dict__`` as well, for a more compact instance:
+
+        class Order(EIP712Struct):
+            __slots__ = ()
+            amount = Uint(256)
     """
+    __slots__ = ('values', '_encoding_cache')
+
+    # type_name is a class attribute, set for each subclass. Nested structs don't have a default value.
+    none_val = None
+
+    # Whether instances keep their member encodings and hash after hashing (see _encode_members). The cache holds
+    # 32 bytes per member plus a list of the encoded values, more than doubling the size of a small hashed instance.
+    # Set it to False on classes with many instances that are hashed once.
+    cache_encodings = True
+
     def __init__(self, **kwargs):
-        super(EIP712Struct, self).__init__(self.type_name, None)
-        members = self.get_members()
+        self._encoding_cache = None
         self.values = dict()
-        for name, typ in members:
+        for name, typ in self._member_schema().members:
             value = kwargs.get(name)
             if isinstance(value, dict):
                 value = typ(**value)
+            elif isinstance(value, list) and isinstance(typ, Array):
+                value = _array_from_data(typ, value)
             self.values[name] = value
 
     @classmethod
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         cls.type_name = cls.__name__
+        cls._member_schema()
+
+    @classmethod
+    def _class_cache(cls) -> dict:
+        """The cache dictionary belonging to this exact class (never inherited from a parent struct)."""
+        try:
+            return cls.__dict__[_CACHE_ATTR]
+        except KeyError:
+            cache = dict()
+            type.__setattr__(cls, _CACHE_ATTR, cache)
+            return cache
+
+    @classmethod
+    def _invalidate_cache(cls):
+        """Drop everything cached for this class. Called automatically when the class's attributes change.
+
+        Structs referencing this one are invalidated too, since their encoded types include this struct's.
+        """
+        cache = cls._class_cache()
+        if not cache:
+            # Nothing cached here means nothing cached upstream depends on us either. Also breaks reference cycles.
+            return
+        cache.clear()
+        for referrer in list(_struct_referrers.get(cls, ())):
+            referrer._invalidate_cache()
+
+    @classmethod
+    def _member_schema(cls) -> _MemberSchema:
+        cache = cls._class_cache()
+        schema = cache.get('schema')
+        if schema is None:
+            schema = _MemberSchema.build(cls)
+            cache['schema'] = schema
+        return schema
 
     def encode_value(self, value=None):
         """Returns the struct's encoded value.
@@ -53,16 +340,53 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
 
         :param value: This parameter is not used for structs.
         """
-        encoded_values = list()
-        for name, typ in self.get_members():
-            if isinstance(typ, type) and issubclass(typ, EIP712Struct):
-                # Nested structs are recursively hashed, with the resulting 32-byte hash appended to the list of values
-                sub_struct = self.get_data_value(name)
-                encoded_values.append(sub_struct.hash_struct())
+        return bytes(self._encode_members().buffer[32:])
+
+    def _encode_members(self) -> _EncodingCache:
+        """Update the encoding of each member, only re-encoding those that may have changed since the last call.
+
+        Nested structs are asked for their hash, which they cache in turn - so changes deep in a tree of structs
+        invalidate the hash of every struct above them. Every member of every nested struct is still visited, but
+        unchanged ones are neither re-encoded nor re-hashed.
+        Without ``cache_encodings``, the returned cache is only used for this call and everything is encoded again.
+        """
+        schema = self._member_schema()
+        cache = self._encoding_cache
+        if cache is None or cache.schema is not schema:
+            cache = _EncodingCache(schema)
+            if self.cache_encodings:
+                self._encoding_cache = cache
+
+        values = self.values
+        cached_values = cache.values
+        buffer = cache.buffer
+        for i, ((name, typ), is_struct) in enumerate(zip(schema.members, schema.struct_flags)):
+            value = values.get(name)
+            if is_struct:
+                # Nested structs are recursively hashed, with the resulting 32-byte hash used as the value
+                member_encoding = value.hash_struct()
+            elif value is cached_values[i]:
+                continue
             else:
                 # Regular types are encoded as normal
-                encoded_values.append(typ.encode_value(self.values[name]))
-        return b''.join(encoded_values)
+                member_encoding = typ.encode_value(value)
+                # Immutable values are remembered by identity. So are streams, which can only be consumed once.
+                cacheable = type(value) in _immutable_value_types or is_stream(value)
+                cached_values[i] = value if cacheable else _UNCACHED
+
+            offset = 32 * (i + 1)
+            if buffer[offset:offset + 32] != member_encoding:
+                buffer[offset:offset + 32] = member_encoding
+                cache.hash = None
+        return cache
+
+    def _mark_dirty(self, name):
+        """Force the given member to be re-encoded the next time the struct is encoded or hashed."""
+        cache = self._encoding_cache
+        if cache is not None:
+            index = cache.schema.index.get(name)
+            if index is not None:
+                cache.values[index] = _UNCACHED
 
     def get_data_value(self, name):
         """Get the value of the given struct parameter.
@@ -74,23 +398,27 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
         """
         if name in self.values:
             self.values[name] = value
+            self._mark_dirty(name)
 
     def data_dict(self):
         """Provide the entire data dictionary representing the struct.
 
         Nested structs instances are also converted to dict form.
         """
-        result = dict()
-        for k, v in self.values.items():
-            if isinstance(v, EIP712Struct):
-                result[k] = v.data_dict()
-            else:
-                result[k] = v
-        return result
+        return {k: _data_value(v) for k, v in self.values.items()}
 
     @classmethod
     def _encode_type(cls, resolve_references: bool) -> str:
-        member_sigs = [f'{typ.type_name} {name}' for name, typ in cls.get_members()]
+        cache = cls._class_cache()
+        cache_key = ('encode_type', resolve_references)
+        struct_sig = cache.get(cache_key)
+        if struct_sig is None:
+            struct_sig = cache[cache_key] = cls._build_encoded_type(resolve_references)
+        return struct_sig
+
+    @classmethod
+    def _build_encoded_type(cls, resolve_references: bool) -> str:
+        member_sigs = [f'{typ.type_name} {name}' for name, typ in cls._member_schema().members]
         struct_sig = f'{cls.type_name}({",".join(member_sigs)})'
 
         if resolve_references:
@@ -105,8 +433,7 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
     def _gather_reference_structs(cls, struct_set):
         """Finds reference structs defined in this struct type, and inserts them into the given set.
         """
-        structs = [m[1] for m in cls.get_members() if isinstance(m[1], type) and issubclass(m[1], EIP712Struct)]
-        for struct in structs:
+        for struct in cls._member_schema().struct_types:
             if struct not in struct_set:
                 struct_set.add(struct)
                 struct._gather_reference_structs(struct_set)
@@ -122,14 +449,47 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
     @classmethod
     def type_hash(cls) -> bytes:
         """Get the keccak hash of the struct's encoded type."""
-        return keccak(text=cls.encode_type())
+        cache = cls._class_cache()
+        result = cache.get('type_hash')
+        if result is None:
+            result = cache['type_hash'] = keccak(text=cls.encode_type())
+        return result
+
+    @classmethod
+    def compile(cls) -> 'CompiledStruct':
+        """Get a precompiled encoder for this struct class, which hashes plain dictionaries of values.
+
+        The result is cached, and rebuilt automatically if this struct (or a struct it references) changes.
+        """
+        cache = cls._class_cache()
+        result = cache.get('compiled')
+        if result is None:
+            from eip712_structs.compiled import CompiledStruct
+            result = cache['compiled'] = CompiledStruct(cls)
+        return result
+
+    @classmethod
+    def view(cls, values: Mapping) -> 'StructView':
+        """Get a read-only ``StructView`` of the given values dictionary as this struct, without copying it."""
+        from eip712_structs.view import StructView
+        return StructView(cls, values)
 
     def hash_struct(self) -> bytes:
         """The hash of the struct.
 
         hash_struct => keccak(type_hash || encode_data)
+
+        The result is cached, and only recomputed if a member's encoding (or the struct's type) changed.
         """
-        return keccak(b''.join([self.type_hash(), self.encode_value()]))
+        cache = self._encode_members()
+        type_hash = self.type_hash()
+        if cache.type_hash is not type_hash:
+            cache.buffer[0:32] = type_hash
+            cache.type_hash = type_hash
+            cache.hash = None
+        if cache.hash is None:
+            cache.hash = keccak256(cache.buffer)
+        return cache.hash
 
     @classmethod
     def get_members(cls) -> List[Tuple[str, EIP712Type]]:
@@ -137,9 +497,7 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
 
         Each tuple is (<parameter_name>, <parameter_type>). The list's order is determined by definition order.
         """
-        members = [m for m in cls.__dict__.items() if isinstance(m[1], EIP712Type)
-                   or (isinstance(m[1], type) and issubclass(m[1], EIP712Struct))]
-        return members
+        return list(cls._member_schema().members)
 
     @staticmethod
     def _assert_domain(domain):
@@ -162,30 +520,66 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
             :returns: This struct + the domain in dict form, structured as specified for EIP712 messages.
             """
         domain = self._assert_domain(domain)
-        structs = {domain, self}
-        self._gather_reference_structs(structs)
-
-        # Build type dictionary
-        types = dict()
-        for struct in structs:
-            members_json = [{
-                'name': m[0],
-                'type': m[1].type_name,
-            } for m in struct.get_members()]
-            types[struct.type_name] = members_json
 
         result = {
             'primaryType': self.type_name,
-            'types': types,
+            'types': self._message_types(type(domain)),
             'domain': domain.data_dict(),
             'message': self.data_dict(),
         }
 
         return result
 
+    @classmethod
+    def _message_types(cls, domain_class) -> dict:
+        """The ``types`` section of messages with this primary type, and the given domain class.
+
+        Cached for each encoded domain type, so domain classes with the same members (like those built by
+        ``from_message``) share an entry, and rebuilt if this class (or a struct it references) changes. Since it's
+        shared by every message, it's frozen: a copy (e.g. ``copy.deepcopy(types)``) must be made to change it.
+        The domain comes first, followed by this struct and the structs it references in alphabetical order.
+        """
+        cache = cls._class_cache()
+        cache_key = ('message_types', domain_class._encode_type(False))
+        types = cache.get(cache_key)
+        if types is None:
+            structs = set()
+            _gather_all_structs(cls, structs)
+            structs.discard(cls)
+            structs.discard(domain_class)
+            ordered = [domain_class, cls] + sorted(structs, key=lambda struct: struct.type_name)
+            types = cache[cache_key] = _freeze(cls._types_section(ordered))
+        return types
+
+    def _json_data(self) -> dict:
+        """Like ``data_dict``, but with bytes as hex strings - ready for any JSON encoder."""
+        return {k: _json_value(v) for k, v in self.values.items()}
+
+    @staticmethod
+    def _types_section(structs) -> dict:
+        """Build the ``types`` section of a message, describing each of the given struct classes."""
+        types = dict()
+        for struct in structs:
+            members_json = [{
+                'name': m[0],
+                'type': m[1].type_name,
+            } for m in struct._member_schema().members]
+            types[struct.type_name] = members_json
+        return types
+
     def to_message_json(self, domain: 'EIP712Struct' = None) -> str:
-        message = self.to_message(domain)
-        return json.dumps(message, cls=BytesJSONEncoder)
+        """Like ``to_message``, serialized as JSON. Bytes values are hex encoded.
+
+        The JSON encoder may be changed with ``eip712_structs.struct.set_json_backend``.
+        """
+        domain = self._assert_domain(domain)
+        message = {
+            'primaryType': self.type_name,
+            'types': self._message_types(type(domain)),
+            'domain': domain._json_data(),
+            'message': self._json_data(),
+        }
+        return _json_dumps(message)
 
     def signable_bytes(self, domain: 'EIP712Struct' = None) -> bytes:
         """Return a ``bytes`` object suitable for signing, as specified for EIP712.
@@ -197,9 +591,35 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
         :return: The bytes object
         """
         domain = self._assert_domain(domain)
-        result = b'\x19\x01' + domain.hash_struct() + self.hash_struct()
+        result = b''.join([b'\x19\x01', domain.hash_struct(), self.hash_struct()])
         return result
 
+    @classmethod
+    def hash_many(cls, items: Iterable[Union[Mapping, 'EIP712Struct']]) -> List[bytes]:
+        """Compute ``hash_struct`` for many messages of this struct type at once.
+
+        :param items: Value dictionaries (as accepted by the constructor) and/or instances of this struct.
+        :return: The struct hashes, in the same order as the given items.
+        """
+        hash_struct = cls.compile().hash_struct
+        return [hash_struct(item) for item in items]
+
+    @classmethod
+    def signable_bytes_many(cls, items: Iterable[Union[Mapping, 'EIP712Struct']],
+                            domain: 'EIP712Struct' = None) -> List[bytes]:
+        """Compute ``signable_bytes`` for many messages of this struct type, all sharing the same domain.
+
+        The domain separator and type hash are only computed once for the whole batch.
+
+        :param items: Value dictionaries (as accepted by the constructor) and/or instances of this struct.
+        :param domain: The domain to include in the hash bytes. If None, uses ``eip712_structs.default_domain``
+        :return: The signable bytes, in the same order as the given items.
+        """
+        domain = cls._assert_domain(domain)
+        prefix = b'\x19\x01' + domain.hash_struct()
+        hash_struct = cls.compile().hash_struct
+        return [prefix + hash_struct(item) for item in items]
+
     @classmethod
     def from_message(cls, message_dict: dict) -> 'StructTuple':
         """Convert a message dictionary into two EIP712Struct objects - one for domain, another for the message struct.
@@ -212,17 +632,49 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
             msg_struct = deserialized.message
             domain_struct = deserialized.domain
 
+        Struct classes are cached (see ``message_struct_cache``), so messages with identical ``types`` sections
+        share the same classes - and their cached type hashes.
+
         :param message_dict: The dictionary, such as what is produced by EIP712Struct.to_message.
         :return: A StructTuple object, containing the message and domain structs.
         """
+        structs = cls._get_message_structs(message_dict['types'])
+
+        primary_struct = structs[message_dict['primaryType']]
+        domain_struct = structs['EIP712Domain']
+
+        primary_result = primary_struct(**message_dict['message'])
+        domain_result = domain_struct(**message_dict['domain'])
+        result = StructTuple(message=primary_result, domain=domain_result)
+
+        return result
+
+    @classmethod
+    def _get_message_structs(cls, types: dict) -> Dict[str, type]:
+        """Like ``_structs_from_types``, but reuses previously built classes for identical types sections."""
+        key = json.dumps(types, sort_keys=True, separators=(',', ':'))
+        structs = message_struct_cache.get(key)
+        if structs is None:
+            structs = cls._structs_from_types(types)
+            message_struct_cache.put(key, structs)
+        return structs
+
+    @staticmethod
+    def _structs_from_types(types: dict) -> Dict[str, type]:
+        """Dynamically construct struct classes from the ``types`` section of a message.
+
+        :return: A dictionary mapping each type name to its newly built struct class.
+        """
         structs = dict()
         unfulfilled_struct_params = defaultdict(list)
 
-        for type_name in message_dict['types']:
-            # Dynamically construct struct class from dict representation
-            StructFromJSON = type(type_name, (EIP712Struct,), {})
+        for type_name in types:
+            # Dynamically construct struct class from dict representation. It's compact, unless a member's name clashes
+            # with an instance attribute.
+            compact = not any(member['name'] in _instance_attributes for member in types[type_name])
+            StructFromJSON = type(type_name, (EIP712Struct,), {'__slots__': ()} if compact else {})
 
-            for member in message_dict['types'][type_name]:
+            for member in types[type_name]:
                 # Either a basic solidity type is set, or None if referring to a reference struct (we'll fill it later)
                 member_name = member['name']
                 member_sol_type = from_solidity_type(member['type'])
@@ -235,53 +687,46 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
 
         # Now that custom structs have been parsed, pass through again to set the references
         for struct_name, unfulfilled_member_names in unfulfilled_struct_params.items():
-            regex_pattern = r'([a-zA-Z0-9_]+)(\[(\d+)?\])?'
-
             struct_class = structs[struct_name]
             for name, type_name in unfulfilled_member_names:
-                match = re.match(regex_pattern, type_name)
-                base_type_name = match.group(1)
-                ref_struct = structs[base_type_name]
-                if match.group(2):
-                    # The type is an array of the struct
-                    arr_len = match.group(3) or 0  # length of 0 means the array is dynamically sized
-                    setattr(struct_class, name, Array(ref_struct, arr_len))
-                else:
-                    setattr(struct_class, name, ref_struct)
+                parsed = parse_type_string(type_name)
+                if parsed is None or parsed[0] not in structs:
+                    raise ValueError(f'Unknown type "{type_name}" for member "{name}" of struct {struct_name}')
+                base_type_name, dimensions = parsed
+                # The member is either the struct itself, or a (possibly multi-dimensional) array of it
+                setattr(struct_class, name, wrap_in_arrays(structs[base_type_name], dimensions))
 
-        primary_struct = structs[message_dict['primaryType']]
-        domain_struct = structs['EIP712Domain']
-
-        primary_result = primary_struct(**message_dict['message'])
-        domain_result = domain_struct(**message_dict['domain'])
-        result = StructTuple(message=primary_result, domain=domain_result)
-
-        return result
+        return structs
 
     @classmethod
     def _assert_key_is_member(cls, key):
-        member_names = {tup[0] for tup in cls.get_members()}
-        if key not in member_names:
+        if key not in cls._member_schema().types:
             raise KeyError(f'"{key}" is not defined for this struct.')
 
     @classmethod
     def _assert_property_type(cls, key, value):
-        """Eagerly check for a correct member type"""
-        members = dict(cls.get_members())
-        typ = members[key]
-
-        if isinstance(typ, type) and issubclass(typ, EIP712Struct):
-            # We expect an EIP712Struct instance. Assert that's true, and check the struct signature too.
-            if not isinstance(value, EIP712Struct) or value._encode_type(False) != typ._encode_type(False):
-                raise ValueError(f'Given value is of type {type(value)}, but we expected {typ}')
-        else:
-            # Since it isn't a nested struct, its an EIP712Type
+        """Eagerly check for a correct member type. Values are checked without being encoded (or hashed)."""
+        typ = cls._member_schema().types[key]
+
+        if _is_struct_type(typ):
+            # We expect an EIP712Struct instance, of this struct or one with the same signature.
+            typ._validate_instance(value)
+        elif not is_stream(value):
+            # Since it isn't a nested struct, its an EIP712Type. Streams are left alone, checking would consume them.
             try:
-                typ.encode_value(value)
+                typ.validate_value(value)
             except Exception as e:
                 raise ValueError(f'The python type {type(value)} does not appear '
                                  f'to be supported for data type {typ}.') from e
 
+    @classmethod
+    def _validate_instance(cls, value):
+        """Raises a ValueError unless the value is an instance of this struct, or of a struct with the same signature.
+        """
+        if type(value) is not cls:
+            if not isinstance(value, EIP712Struct) or value._encode_type(False) != cls._encode_type(False):
+                raise ValueError(f'Given value is of type {type(value)}, but we expected {cls}')
+
     def __getitem__(self, key):
         """Provide access directly to the underlying value dictionary"""
         self._assert_key_is_member(key)
@@ -292,7 +737,8 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
         self._assert_key_is_member(key)
         self._assert_property_type(key, value)
 
-        return self.values.__setitem__(key, value)
+        self.values[key] = value
+        self._mark_dirty(key)
 
     def __delitem__(self, _):
         raise TypeError('Deleting entries from an EIP712Struct is not allowed.')
@@ -315,6 +761,17 @@ class EIP712Struct(EIP712Type, metaclass=OrderedAttributesMeta):
         value_hashes = [hash(k) ^ hash(v) for k, v in self.values.items()]
         return functools.reduce(operator.xor, value_hashes, hash(self.type_name))
 
+    def __getstate__(self):
+        # Only the values are copied or pickled - the encoding cache is rebuilt on demand
+        return self.values, getattr(self, '__dict__', None)
+
+    def __setstate__(self, state):
+        values, instance_dict = state
+        self._encoding_cache = None
+        self.values = values
+        if instance_dict:
+            self.__dict__.update(instance_dict)
+
 
 class StructTuple(NamedTuple):
     message: EIP712Struct
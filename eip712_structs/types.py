@@ -1,9 +1,121 @@
+import copy
+import functools
 import re
+from collections.abc import MutableSequence
 from json import JSONEncoder
-from typing import Any, Union, Type
+from typing import Any, Iterable, Optional, Tuple, Type, Union
 
+from eth_hash.auto import keccak as keccak256
 from eth_utils.crypto import keccak
-from eth_utils.conversions import to_bytes, to_hex, to_int
+from eth_utils.conversions import to_bytes
+
+from eip712_structs.cache import LRUCache
+
+# _new_keccak() returns an incremental keccak256 hasher, with ``update(data)`` and ``digest()`` methods.
+# ``digest()`` may be called at any time, and more data may be added afterwards.
+try:
+    from sha3 import keccak_256 as _new_keccak  # pysha3
+except ImportError:
+    try:
+        from Crypto.Hash import keccak as _cryptodome_keccak
+
+        def _new_keccak():
+            return _cryptodome_keccak.new(digest_bits=256, update_after_digest=True)
+    except ImportError:
+        from eth_hash.auto import keccak as _eth_hash_keccak
+
+        def _new_keccak():
+            return _eth_hash_keccak.new(b'')
+
+# Streamed values (files, iterators) are hashed in pieces of about this many bytes
+_STREAM_CHUNK_SIZE = 1 << 16
+
+# Precomputed 32-byte words for common encodings
+_ZERO_WORD = bytes(32)
+_ONE_WORD = bytes(31) + b'\x01'
+_ADDRESS_PADDING = bytes(12)
+_ADDRESS_MAX = (1 << 160) - 1
+
+# Maps address inputs (raw bytes or hex strings) to their encoded form. Disabled by default, enable it with
+# ``address_cache.resize(n)``. Useful when the same addresses are encoded over and over.
+address_cache = LRUCache(maxsize=0)
+
+
+class ContentHashCache(LRUCache):
+    """An LRUCache mapping the contents of dynamic ``string`` and ``bytes`` values to their keccak256 hash.
+
+    Values longer than ``max_value_size`` bytes are always hashed directly, and never stored.
+    Like any ``LRUCache``, a ``maxsize`` of 0 disables it.
+    """
+    def __init__(self, maxsize: int = 0, max_value_size: int = 1024):
+        super(ContentHashCache, self).__init__(maxsize)
+        self.max_value_size = max_value_size
+        self.skipped = 0
+
+    def keccak(self, data: bytes) -> bytes:
+        if not self.maxsize:
+            return keccak(data)
+        # Checking the type first: streamed values (iterators, files) have no length
+        if type(data) is not bytes or len(data) > self.max_value_size:
+            with self._lock:
+                self.skipped += 1
+            return keccak(data)
+
+        result = self.get(data)
+        if result is None:
+            result = keccak(data)
+            self.put(data, result)
+        return result
+
+    def reset_stats(self):
+        super(ContentHashCache, self).reset_stats()
+        with self._lock:
+            self.skipped = 0
+
+    def stats(self) -> dict:
+        result = super(ContentHashCache, self).stats()
+        result['max_value_size'] = self.max_value_size
+        with self._lock:
+            result['skipped'] = self.skipped
+        return result
+
+
+def hash_encodings(encodings: Iterable[bytes]) -> bytes:
+    """The keccak256 hash of the concatenated encodings, as used for array values.
+
+    Accumulating into one buffer keeps far less memory alive than a list of encodings to join. Large (or lazily
+    generated) arrays are fed to an incremental hasher a chunk at a time instead, so they're hashed in constant memory.
+    """
+    buffer = bytearray()
+    hasher = None
+    for encoding in encodings:
+        buffer += encoding
+        if len(buffer) >= _STREAM_CHUNK_SIZE:
+            if hasher is None:
+                hasher = _new_keccak()
+            hasher.update(buffer)
+            buffer = bytearray()
+    if hasher is None:
+        return keccak256(buffer)
+    hasher.update(buffer)
+    return hasher.digest()
+
+
+def is_stream(value) -> bool:
+    """True for single-use values, like files and iterators, that are consumed by encoding them."""
+    return hasattr(value, 'read') or hasattr(value, '__next__')
+
+
+def iter_chunks(value) -> Iterable:
+    """Iterate over a streamed ``bytes`` value in chunks. Accepts a readable binary file, or an iterable of chunks."""
+    if hasattr(value, 'read'):
+        return iter(functools.partial(value.read, _STREAM_CHUNK_SIZE), b'')
+    return iter(value)
+
+
+# Caches the hashes of repeated string/bytes values, like token symbols or domain names.
+# Disabled by default, enable it with ``content_hash_cache.resize(n)``.
+content_hash_cache = ContentHashCache(maxsize=0)
 
 
 class EIP712Type:
@@ -11,6 +123,8 @@ class EIP712Type:
 
     Generally you wouldn't use this - instead, see the subclasses below. Or you may want an EIP712Struct instead.
     """
+    __slots__ = ('type_name', 'none_val')
+
     def __init__(self, type_name: str, none_val: Any):
         self.type_name = type_name
         self.none_val = none_val
@@ -33,6 +147,18 @@ class EIP712Type:
         """
         pass
 
+    def validate_value(self, value):
+        """Check that the value can be encoded as this type, raising an exception if not.
+
+        Unlike ``encode_value``, this never hashes anything, so it's cheap enough to run on every assignment.
+        """
+        if value is not None:
+            self._validate_value(value)
+
+    def _validate_value(self, value):
+        """May be overridden by subclasses with a cheaper check. By default, the value is encoded."""
+        self._encode_value(value)
+
     def __eq__(self, other):
         self_type = getattr(self, 'type_name')
         other_type = getattr(other, 'type_name')
@@ -63,9 +189,134 @@ class Array(EIP712Type):
 
     def _encode_value(self, value):
         """Arrays are encoded by concatenating their encoded contents, and taking the keccak256 hash."""
-        encoder = self.member_type
-        encoded_values = [encoder.encode_value(v) for v in value]
-        return keccak(b''.join(encoded_values))
+        if isinstance(value, ArrayValue) and value.array_type is self:
+            return value.hash()
+        return hash_encodings(map(self.member_type.encode_value, value))
+
+    def _validate_value(self, value):
+        if isinstance(value, ArrayValue) and value.array_type is self:
+            return  # Elements were checked as they were added
+        member_type = self.member_type
+        if isinstance(member_type, EIP712Type):
+            validate = member_type.validate_value
+        else:
+            validate = member_type._validate_instance  # A struct class
+        for v in value:
+            validate(v)
+
+
+class ArrayValue(MutableSequence):
+    def __init__(self, array_type: Array, items: Iterable = ()):
+        """A list-like array value, which keeps the encoding of each of its elements.
+
+        Use it in place of a list for large arrays that change incrementally. Appending only encodes and hashes the
+        new element, and replacing, inserting or removing elements never re-encodes the other elements.
+        Elements are encoded when they're added: a struct element changed in place afterwards must be assigned again.
+
+        Example:
+            class Batch(EIP712Struct):
+                orders = Array(Order)
+
+            orders = ArrayValue(Batch.orders, [order_1, order_2])
+            batch = Batch(orders=orders)
+            orders.append(order_3)  # Only order_3 is encoded
+        """
+        self.array_type = array_type
+        self._items = list()
+        self._encodings = list()
+        self._hasher = _new_keccak()  # Covers every encoding in order, or None if it needs to be rebuilt
+        self._hash = None
+        self.extend(items)
+
+    def _encode_element(self, item) -> bytes:
+        member_type = self.array_type.member_type
+        # Encoding checks basic values, but would accept any struct: those (and arrays of them) are checked first
+        if not isinstance(member_type, EIP712Type):
+            member_type._validate_instance(item)  # A struct class
+        elif isinstance(member_type, Array):
+            member_type.validate_value(item)
+        return member_type.encode_value(item)
+
+    def _changed(self, appended: bytes = None):
+        """Update the running hash after an append, or drop it for any other change."""
+        self._hash = None
+        if appended is not None and self._hasher is not None:
+            self._hasher.update(appended)
+        else:
+            self._hasher = None
+
+    def hash(self) -> bytes:
+        """The array's encoded value: the keccak256 hash of its concatenated element encodings."""
+        if self._hash is None:
+            if self._hasher is None:
+                self._hasher = _new_keccak()
+                self._hasher.update(b''.join(self._encodings))
+            self._hash = self._hasher.digest()
+        return self._hash
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        # Encode before changing anything, so an invalid value leaves the array as it was.
+        if isinstance(index, slice):
+            value = list(value)
+            encodings = [self._encode_element(v) for v in value]
+        else:
+            encodings = self._encode_element(value)
+        self._items[index] = value
+        self._encodings[index] = encodings
+        self._changed()
+
+    def __delitem__(self, index):
+        del self._items[index]
+        del self._encodings[index]
+        self._changed()
+
+    def __len__(self):
+        return len(self._items)
+
+    def insert(self, index, value):
+        encoded = self._encode_element(value)
+        self._items.insert(index, value)
+        self._encodings.insert(index, encoded)
+        self._changed()
+
+    def append(self, value):
+        encoded = self._encode_element(value)
+        self._items.append(value)
+        self._encodings.append(encoded)
+        self._changed(appended=encoded)
+
+    def __eq__(self, other):
+        if isinstance(other, ArrayValue):
+            return self._items == other._items
+        return isinstance(other, list) and self._items == other
+
+    def __repr__(self):
+        return f'ArrayValue({self.array_type.type_name}, {self._items!r})'
+
+    def __getstate__(self):
+        # The running hasher can't be copied or pickled - it's rebuilt from the encodings on demand
+        return self.array_type, self._items, self._encodings, self._hash
+
+    def __setstate__(self, state):
+        self.array_type, items, encodings, self._hash = state
+        self._items = list(items)
+        self._encodings = list(encodings)
+        self._hasher = None
+
+    def __copy__(self):
+        result = type(self).__new__(type(self))
+        result.__setstate__(self.__getstate__())
+        return result
+
+    def __deepcopy__(self, memo):
+        # The array type is part of the schema, not of the value, so it's shared with the copy
+        result = type(self).__new__(type(self))
+        memo[id(self)] = result
+        result.__setstate__((self.array_type, copy.deepcopy(self._items, memo), self._encodings, self._hash))
+        return result
 
 
 class Address(EIP712Type):
@@ -74,16 +325,34 @@ class Address(EIP712Type):
         super(Address, self).__init__('address', 0)
 
     def _encode_value(self, value):
-        """Addresses are encoded like Uint160 numbers."""
+        """Addresses are encoded like Uint160 numbers.
 
-        # Some smart conversions - need to get the address to a numeric before we encode it
-        if isinstance(value, bytes):
-            v = to_int(value)
-        elif isinstance(value, str):
-            v = to_int(hexstr=value)
-        else:
-            v = value  # Fallback, just use it as-is.
-        return Uint(160).encode_value(v)
+        Raw bytes and hex strings must be exactly 20 bytes long. Their encodings may be cached, see ``address_cache``.
+        """
+        if isinstance(value, (bytes, str)):
+            if not address_cache.maxsize:
+                return _encode_address(value)
+            encoded = address_cache.get(value)
+            if encoded is None:
+                encoded = _encode_address(value)
+                address_cache.put(value, encoded)
+            return encoded
+
+        # Fallback, treat it as a number.
+        if value < 0:
+            raise OverflowError("can't convert negative int to unsigned")
+        if value > _ADDRESS_MAX:
+            raise OverflowError('int too big to convert')
+        return value.to_bytes(32, byteorder='big')
+
+
+def _encode_address(value: Union[bytes, str]) -> bytes:
+    if isinstance(value, str):
+        # Hex strings, with or without the 0x prefix
+        value = bytes.fromhex(value[2:] if value[:2] in ('0x', '0X') else value)
+    if len(value) != 20:
+        raise ValueError(f'Addresses must be 20 bytes long. Got {len(value)} bytes.')
+    return _ADDRESS_PADDING + value
 
 
 class Boolean(EIP712Type):
@@ -94,9 +363,9 @@ class Boolean(EIP712Type):
     def _encode_value(self, value):
         """Booleans are encoded like the uint256 values of 0 and 1."""
         if value is False:
-            return Uint(256).encode_value(0)
+            return _ZERO_WORD
         elif value is True:
-            return Uint(256).encode_value(1)
+            return _ONE_WORD
         else:
             raise ValueError(f'Must be True or False. Got: {value}')
 
@@ -124,19 +393,39 @@ class Bytes(EIP712Type):
         super(Bytes, self).__init__(type_name, b'')
 
     def _encode_value(self, value):
-        """Static bytesN types are encoded by right-padding to 32 bytes. Dynamic bytes types are keccak256 hashed."""
+        """Static bytesN types are encoded by right-padding to 32 bytes. Dynamic bytes types are keccak256 hashed.
+
+        Besides bytes-like and hex string values, dynamic bytes may be given as a readable binary file, or an iterable
+        of bytes-like chunks. These are hashed incrementally, without holding the whole value in memory.
+        """
         if isinstance(value, str):
             # Try converting to a bytestring, assuming that it's been given as hex
             value = to_bytes(hexstr=value)
 
         if self.length == 0:
-            return keccak(value)
+            if isinstance(value, (bytes, bytearray)) or not hasattr(value, 'read') and not hasattr(value, '__iter__'):
+                return content_hash_cache.keccak(value)
+            hasher = _new_keccak()
+            if isinstance(value, memoryview):
+                hasher.update(value)
+            else:
+                for chunk in iter_chunks(value):
+                    hasher.update(chunk)
+            return hasher.digest()
         else:
             if len(value) > self.length:
                 raise ValueError(f'{self.type_name} was given bytes with length {len(value)}')
             padding = bytes(32 - len(value))
             return value + padding
 
+    def _validate_value(self, value):
+        if self.length != 0:
+            self._encode_value(value)  # Static bytes are cheap to encode
+        elif isinstance(value, str):
+            to_bytes(hexstr=value)
+        elif not isinstance(value, (bytes, bytearray, memoryview)) and not is_stream(value):
+            self._encode_value(value)
+
 
 class Int(EIP712Type):
     def __init__(self, length: int = 256):
@@ -151,13 +440,22 @@ class Int(EIP712Type):
         if length < 8 or length > 256 or length % 8 != 0:
             raise ValueError(f'Int length must be a multiple of 8, between 8 and 256. Got: {length}')
         self.length = length
+        self.min_value = -(1 << (length - 1))
+        self.max_value = (1 << (length - 1)) - 1
         super(Int, self).__init__(f'int{length}', 0)
 
     def _encode_value(self, value: int):
         """Ints are encoded by padding them to 256-bit representations."""
-        value.to_bytes(self.length // 8, byteorder='big', signed=True)  # For validation
+        if value < self.min_value or value > self.max_value:
+            raise OverflowError('int too big to convert')
         return value.to_bytes(32, byteorder='big', signed=True)
 
+    def _validate_value(self, value):
+        if not isinstance(value, int):
+            raise TypeError(f'Expected an int. Got: {type(value)}')
+        if value < self.min_value or value > self.max_value:
+            raise OverflowError('int too big to convert')
+
 
 class String(EIP712Type):
     def __init__(self):
@@ -166,7 +464,11 @@ class String(EIP712Type):
 
     def _encode_value(self, value):
         """Strings are encoded by taking the keccak256 hash of their contents."""
-        return keccak(text=value)
+        return content_hash_cache.keccak(value.encode('utf-8'))
+
+    def _validate_value(self, value):
+        if not isinstance(value, str):
+            raise TypeError(f'Expected a str. Got: {type(value)}')
 
 
 class Uint(EIP712Type):
@@ -182,12 +484,24 @@ class Uint(EIP712Type):
         if length < 8 or length > 256 or length % 8 != 0:
             raise ValueError(f'Uint length must be a multiple of 8, between 8 and 256. Got: {length}')
         self.length = length
+        self.max_value = (1 << length) - 1
         super(Uint, self).__init__(f'uint{length}', 0)
 
     def _encode_value(self, value: int):
         """Uints are encoded by padding them to 256-bit representations."""
-        value.to_bytes(self.length // 8, byteorder='big', signed=False)  # For validation
-        return value.to_bytes(32, byteorder='big', signed=False)
+        if value < 0:
+            raise OverflowError("can't convert negative int to unsigned")
+        if value > self.max_value:
+            raise OverflowError('int too big to convert')
+        return value.to_bytes(32, byteorder='big')
+
+    def _validate_value(self, value):
+        if not isinstance(value, int):
+            raise TypeError(f'Expected an int. Got: {type(value)}')
+        if value < 0:
+            raise OverflowError("can't convert negative int to unsigned")
+        if value > self.max_value:
+            raise OverflowError('int too big to convert')
 
 
 # This helper dict maps solidity's type names to our EIP712Type classes
@@ -201,18 +515,59 @@ solidity_type_map = {
 }
 
 
+# Splits a type string like "uint256[][3]" into its base type ("uint256") and its array dimensions ("[][3]")
+_type_string_pattern = re.compile(r'([A-Za-z_$][A-Za-z0-9_$]*)((?:\[\d*\])*)')
+_array_dimension_pattern = re.compile(r'\[(\d*)\]')
+# Splits a basic type name like "bytes32" into its name ("bytes") and optional length ("32")
+_basic_type_pattern = re.compile(r'([a-z]+)(\d+)?')
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_type_string(type_string: str) -> Optional[Tuple[str, Tuple[int, ...]]]:
+    """Split a type string into its base type name, and its array dimensions (innermost first).
+
+    Dynamically sized dimensions are given as 0. Returns None if the string isn't a valid type.
+
+    Example:
+        parse_type_string('uint256')       # ('uint256', ())
+        parse_type_string('Person[][3]')   # ('Person', (0, 3))
+    """
+    match = _type_string_pattern.fullmatch(type_string)
+    if match is None:
+        return None
+    dimensions = tuple(int(d or 0) for d in _array_dimension_pattern.findall(match.group(2)))
+    return match.group(1), dimensions
+
+
+def wrap_in_arrays(member_type: Union[EIP712Type, Type[EIP712Type]], dimensions: Tuple[int, ...]):
+    """Nest the given member type in arrays of the given dimensions, as produced by ``parse_type_string``."""
+    for length in dimensions:
+        member_type = Array(member_type, length)
+    return member_type
+
+
+@functools.lru_cache(maxsize=1024)
 def from_solidity_type(solidity_type: str):
-    """Convert a string into the EIP712Type implementation. Basic types only."""
-    pattern = r'([a-z]+)(\d+)?(\[(\d+)?\])?'
-    match = re.match(pattern, solidity_type)
+    """Convert a string into the EIP712Type implementation. Basic types (and arrays of them) only.
+
+    Results are memoized, so the returned instances are shared and must not be modified.
+    """
+    parsed = parse_type_string(solidity_type)
+    if parsed is None:
+        return None
+
+    base_type_name, dimensions = parsed
+    if dimensions:
+        # Build the arrays around the (interned) base type
+        base_type = from_solidity_type(base_type_name)
+        return None if base_type is None else wrap_in_arrays(base_type, dimensions)
 
+    match = _basic_type_pattern.fullmatch(base_type_name)
     if match is None:
         return None
 
     type_name = match.group(1)  # The type name, like the "bytes" in "bytes32"
     opt_len = match.group(2)    # An optional length spec, like the "32" in "bytes32"
-    is_array = match.group(3)   # Basically just checks for square brackets
-    array_len = match.group(4)  # For fixed length arrays only, this is the length
 
     if type_name not in solidity_type_map:
         # Only supporting basic types here - return None if we don't recognize it.
@@ -221,24 +576,16 @@ def from_solidity_type(solidity_type: str):
     # Construct the basic type
     base_type = solidity_type_map[type_name]
     if opt_len:
-        type_instance = base_type(int(opt_len))
-    else:
-        type_instance = base_type()
-
-    if is_array:
-        # Nest the aforementioned basic type into an Array.
-        if array_len:
-            result = Array(type_instance, int(array_len))
-        else:
-            result = Array(type_instance)
-        return result
+        return base_type(int(opt_len))
     else:
-        return type_instance
+        return base_type()
 
 
 class BytesJSONEncoder(JSONEncoder):
     def default(self, o):
         if isinstance(o, bytes):
-            return to_hex(o)
+            return '0x' + o.hex()
+        elif isinstance(o, ArrayValue):
+            return list(o)
         else:
             return super(BytesJSONEncoder, self).default(o)
@@ -0,0 +1,77 @@
+from collections.abc import Mapping
+from typing import Any, Iterator
+
+from eip712_structs.struct import EIP712Struct, StructTuple, _is_struct_type
+
+
+class StructView(Mapping):
+    """A read-only view of a dictionary of values, as an instance of the given struct class.
+
+    The values are neither copied nor validated up front, which makes a view much cheaper than building the struct
+    (and its nested structs) when a message only needs to be hashed, verified, or read from.
+    Hashing uses the struct's compiled encoders (see ``EIP712Struct.compile``).
+
+    Since the underlying dictionary still belongs to the caller, nothing is cached: changes to it are seen by the view.
+
+    Example:
+        order = StructView(Order, json.loads(order_json))
+        order['amount']
+        order.signable_bytes(domain)
+    """
+    __slots__ = ('struct_class', '_values')
+
+    def __init__(self, struct_class, values: Mapping):
+        self.struct_class = struct_class
+        self._values = values
+
+    @classmethod
+    def from_message(cls, message_dict: dict) -> StructTuple:
+        """Like ``EIP712Struct.from_message``, but returns views over the message's ``message`` and ``domain`` dicts.
+
+        Struct classes are shared with ``EIP712Struct.from_message``, and only built once per distinct ``types``.
+        """
+        structs = EIP712Struct._get_message_structs(message_dict['types'])
+        return StructTuple(message=cls(structs[message_dict['primaryType']], message_dict['message']),
+                           domain=cls(structs['EIP712Domain'], message_dict['domain']))
+
+    @property
+    def type_name(self) -> str:
+        return self.struct_class.type_name
+
+    def type_hash(self) -> bytes:
+        return self.struct_class.type_hash()
+
+    def encode_value(self) -> bytes:
+        """Returns the concatenated bytes32 representation of each member. See ``EIP712Struct.encode_value``."""
+        return self.struct_class.compile().encode_value(self._values)
+
+    def hash_struct(self) -> bytes:
+        """The hash of the struct: keccak(type_hash || encode_data)"""
+        return self.struct_class.compile().hash_struct(self._values)
+
+    def signable_bytes(self, domain=None) -> bytes:
+        """Return the EIP712 signable bytes. See ``EIP712Struct.signable_bytes``.
+
+        :param domain: An EIP712Struct or StructView for the domain. If None, uses ``eip712_structs.default_domain``.
+        """
+        domain = EIP712Struct._assert_domain(domain)
+        return b'\x19\x01' + domain.hash_struct() + self.hash_struct()
+
+    def __getitem__(self, key) -> Any:
+        """Get a member's value. Nested struct values are returned as views too."""
+        typ = self.struct_class._member_schema().types.get(key)
+        if typ is None:
+            raise KeyError(f'"{key}" is not defined for this struct.')
+        value = self._values.get(key)
+        if value is not None and _is_struct_type(typ) and not isinstance(value, EIP712Struct):
+            return StructView(typ, value)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.struct_class._member_schema().names)
+
+    def __len__(self) -> int:
+        return len(self.struct_class._member_schema().names)
+
+    def __repr__(self):
+        return f'StructView({self.type_name}, {self._values!r})'
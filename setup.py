@@ -10,6 +10,7 @@ NAME = 'eip712-structs'
 VERSION = '1.1.0'
 
 install_requirements = [
+    'eth-hash>=0.2.0',
     'eth-utils>=1.4.0',
     'pysha3>=1.0.2',
 ]
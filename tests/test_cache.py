@@ -0,0 +1,44 @@
+import pytest
+
+from eip712_structs.cache import LRUCache
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    assert cache.get('a') is None
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+
+    # 'b' is now the least recently used entry, so it's evicted first
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('b', 'default') == 'default'
+    assert len(cache) == 2
+
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 1, 'misses': 2}
+
+    assert cache.pop('a') == 1
+    assert cache.pop('a') is None
+
+    cache.clear()
+    assert cache.stats() == {'size': 0, 'maxsize': 2, 'hits': 0, 'misses': 0}
+
+
+def test_lru_cache_resize():
+    cache = LRUCache(maxsize=3)
+    for i in range(3):
+        cache.put(i, i)
+
+    cache.resize(1)
+    assert len(cache) == 1
+    assert 2 in cache
+
+    # A size of 0 disables the cache
+    cache.resize(0)
+    cache.put('a', 1)
+    assert len(cache) == 0
+    assert cache.get('a') is None
+
+    with pytest.raises(ValueError, match='must not be negative'):
+        LRUCache(maxsize=-1)
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from eip712_structs import Address, Array, Boolean, Bytes, EIP712Struct, Int, String, Uint, make_domain
+
+
+class Person(EIP712Struct):
+    name = String()
+    wallet = Address()
+
+
+class Mail(EIP712Struct):
+    source = Person
+    dest = Person
+    contents = String()
+    attachment = Bytes()
+    tags = Array(Bytes(4))
+    priority = Int(8)
+    read = Boolean()
+    size = Uint(64)
+
+
+def make_mail_values():
+    return {
+        'source': {'name': 'Cow', 'wallet': os.urandom(20)},
+        'dest': {'name': 'Bob', 'wallet': '0x' + os.urandom(20).hex()},
+        'contents': 'Hello, Bob!',
+        'attachment': os.urandom(100),
+        'tags': [os.urandom(4) for _ in range(3)],
+        'priority': -5,
+        'read': True,
+        'size': 1234,
+    }
+
+
+def test_compiled_matches_struct():
+    values = make_mail_values()
+    mail = Mail(**values)
+    compiled = Mail.compile()
+
+    assert compiled.encode_value(values) == mail.encode_value()
+    assert compiled.hash_struct(values) == mail.hash_struct()
+    assert compiled.hash_struct(mail) == mail.hash_struct()
+
+    domain = make_domain(name='compiled')
+    assert compiled.signable_bytes(values, domain) == mail.signable_bytes(domain)
+
+
+def test_compiled_none_values():
+    class Foo(EIP712Struct):
+        s = String()
+        i = Int(256)
+        a = Array(Uint(256))
+
+    assert Foo.compile().hash_struct({}) == Foo().hash_struct()
+
+    with pytest.raises(ValueError, match='A value is required for nested struct Person'):
+        Mail.compile().hash_struct({})
+
+
+def test_compiled_struct_arrays():
+    class Bar(EIP712Struct):
+        u = Uint(256)
+
+    class Foo(EIP712Struct):
+        bars = Array(Bar)
+
+    bars = [{'u': i} for i in range(5)]
+    foo = Foo(bars=[Bar(**b) for b in bars])
+    assert Foo.compile().hash_struct({'bars': bars}) == foo.hash_struct()
+
+
+def test_compile_cache_invalidation():
+    class Bar(EIP712Struct):
+        u = Uint(256)
+
+    class Foo(EIP712Struct):
+        bar = Bar
+
+    compiled = Foo.compile()
+    assert Foo.compile() is compiled
+
+    # Changing a referenced struct recompiles the referencing struct too
+    Bar.s = String()
+    assert Foo.compile() is not compiled
+
+    values = {'bar': {'u': 1, 's': 'hello'}}
+    assert Foo.compile().hash_struct(values) == Foo(**values).hash_struct()
+
+
+def test_compile_recursive_types():
+    class Node(EIP712Struct):
+        v = Uint(256)
+
+    Node.children = Array(Node)
+
+    values = {'v': 1, 'children': [{'v': 2, 'children': []}, {'v': 3, 'children': [{'v': 4, 'children': []}]}]}
+    node = Node(**values)
+    assert Node.compile().hash_struct(values) == node.hash_struct()
+    assert Node.compile().hash_struct(node) == node.hash_struct()
+
+    # Cyclic references through struct members compile too
+    class C(EIP712Struct):
+        pass
+
+    class B(EIP712Struct):
+        c = C
+
+    class A(EIP712Struct):
+        b = B
+
+    C.a = A
+    assert A.compile().type_hash == A.type_hash()
+    with pytest.raises(ValueError, match='A value is required for nested struct C'):
+        A.compile().hash_struct({'b': {}})
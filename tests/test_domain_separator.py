@@ -79,3 +79,48 @@ def test_default_domain(default_domain_manager):
     # Using a different domain should not use any current default domain
     assert implicit_msg != foo.to_message(other_domain)
     assert implicit_bytes != foo.signable_bytes(other_domain)
+
+
+def test_domain_cache():
+    domain = make_domain(name='cached', chainId=1)
+    assert make_domain(name='cached', chainId='1') is domain
+    assert make_domain(name='cached', chainId=2) is not domain
+
+    # Unhashable values skip the cache, but still work
+    salt = bytearray(os.urandom(32))
+    assert make_domain(salt=salt) is not make_domain(salt=salt)
+
+    # A cached domain that was modified is not handed out again
+    domain['name'] = 'modified'
+    new_domain = make_domain(name='cached', chainId=1)
+    assert new_domain is not domain
+    assert new_domain['name'] == 'cached'
+
+
+def test_domain_separator_cache():
+    class Foo(EIP712Struct):
+        s = String()
+    foo = Foo(s='hello world')
+
+    domain = make_domain(name='name', version='1')
+    first_bytes = foo.signable_bytes(domain)
+    assert first_bytes[2:34] == domain.hash_struct()
+    assert foo.signable_bytes(domain) == first_bytes
+
+    # Changing any domain value must produce a new domain separator
+    domain['version'] = '2'
+    assert foo.signable_bytes(domain)[2:34] == domain.hash_struct()
+    domain.set_data_value('name', 'other name')
+    assert foo.signable_bytes(domain)[2:34] == domain.hash_struct()
+    assert foo.signable_bytes(domain) != first_bytes
+
+
+def test_domain_class_reuse():
+    domain = make_domain(name='one', chainId=1)
+    other_domain = make_domain(name='two', chainId=2)
+    assert type(domain) is type(other_domain)
+    assert domain.hash_struct() != other_domain.hash_struct()
+
+    # Field order always follows the standard, regardless of which fields are used
+    assert type(make_domain(name='one', salt=os.urandom(32))) is not type(domain)
+    assert make_domain(salt=os.urandom(32), chainId=5).encode_type() == 'EIP712Domain(uint256 chainId,bytes32 salt)'
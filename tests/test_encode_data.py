@@ -1,11 +1,17 @@
+import copy
+import io
+import json
 import os
+import pickle
 import random
 import string
 
 from eth_utils.crypto import keccak
 import pytest
 
-from eip712_structs import Address, Array, Boolean, Bytes, Int, String, Uint, EIP712Struct, make_domain
+from eip712_structs import Address, Array, ArrayValue, Boolean, Bytes, Int, String, Uint, EIP712Struct, make_domain
+from eip712_structs.jsonl import iter_messages
+from eip712_structs.view import StructView
 
 
 def signed_min_max(bits):
@@ -286,3 +292,435 @@ def test_value_access():
 
     with pytest.raises(TypeError):
         del foo['s']
+
+
+def test_batch_hashing():
+    class Bar(EIP712Struct):
+        u = Uint(256)
+
+    class Foo(EIP712Struct):
+        s = String()
+        bar = Bar
+
+    domain = make_domain(name='batch')
+    values = [{'s': f'foo {i}', 'bar': {'u': i}} for i in range(10)]
+    structs = [Foo(**v) for v in values]
+
+    expected_hashes = [foo.hash_struct() for foo in structs]
+    assert Foo.hash_many(values) == expected_hashes
+    assert Foo.hash_many(structs) == expected_hashes
+    assert Foo.hash_many(iter(values)) == expected_hashes
+    assert Foo.hash_many([]) == []
+
+    expected_bytes = [foo.signable_bytes(domain) for foo in structs]
+    assert Foo.signable_bytes_many(values, domain) == expected_bytes
+    assert Foo.signable_bytes_many(structs, domain) == expected_bytes
+
+
+def test_batch_hashing_recursive_type():
+    class Node(EIP712Struct):
+        v = Uint(256)
+
+    Node.children = Array(Node)
+
+    domain = make_domain(name='batch')
+    values = [{'v': i, 'children': [{'v': i + 1, 'children': []}]} for i in range(5)]
+    structs = [Node(**v) for v in values]
+
+    assert Node.hash_many(values) == [node.hash_struct() for node in structs]
+    assert Node.hash_many(structs) == [node.hash_struct() for node in structs]
+    assert Node.signable_bytes_many(values, domain) == [node.signable_bytes(domain) for node in structs]
+
+
+def test_primitive_encoding_bounds():
+    address_type = Address()
+    address = os.urandom(20)
+    expected = bytes(12) + address
+    assert address_type.encode_value(address) == expected
+    assert address_type.encode_value('0x' + address.hex()) == expected
+    assert address_type.encode_value(address.hex()) == expected
+    assert address_type.encode_value(int.from_bytes(address, 'big')) == expected
+    with pytest.raises(OverflowError, match='too big'):
+        address_type.encode_value(pow(2, 160))
+    with pytest.raises(OverflowError, match='negative int to unsigned'):
+        address_type.encode_value(-1)
+
+    for bits in (8, 64, 256):
+        min_val, max_val = signed_min_max(bits)
+        assert Int(bits).encode_value(min_val) == min_val.to_bytes(32, 'big', signed=True)
+        assert Int(bits).encode_value(max_val) == max_val.to_bytes(32, 'big', signed=True)
+        assert Uint(bits).encode_value(unsigned_max(bits)) == unsigned_max(bits).to_bytes(32, 'big')
+        with pytest.raises(OverflowError):
+            Int(bits).encode_value(max_val + 1)
+        with pytest.raises(OverflowError):
+            Int(bits).encode_value(min_val - 1)
+        with pytest.raises(OverflowError):
+            Uint(bits).encode_value(unsigned_max(bits) + 1)
+
+
+def test_address_validation():
+    address_type = Address()
+    with pytest.raises(ValueError, match='Addresses must be 20 bytes long. Got 19 bytes.'):
+        address_type.encode_value(os.urandom(19))
+    with pytest.raises(ValueError, match='Addresses must be 20 bytes long. Got 21 bytes.'):
+        address_type.encode_value('0x' + os.urandom(21).hex())
+    with pytest.raises(ValueError):
+        address_type.encode_value('0x' + 'zz' * 20)
+
+
+def test_address_cache():
+    from eip712_structs.types import address_cache
+
+    address_type = Address()
+    address = '0x' + os.urandom(20).hex()
+    expected = bytes(12) + bytes.fromhex(address[2:])
+    try:
+        address_cache.resize(2)
+        address_cache.clear()
+        assert address_type.encode_value(address) == expected
+        assert address_type.encode_value(address) == expected
+        assert address_cache.stats() == {'size': 1, 'maxsize': 2, 'hits': 1, 'misses': 1}
+
+        # Invalid addresses are never cached
+        with pytest.raises(ValueError):
+            address_type.encode_value(address[:-2])
+        assert len(address_cache) == 1
+    finally:
+        address_cache.resize(0)
+        address_cache.clear()
+
+
+def test_content_hash_cache():
+    from eip712_structs.types import content_hash_cache
+
+    string_type = String()
+    bytes_type = Bytes()
+    big_value = os.urandom(100)
+    try:
+        content_hash_cache.resize(10)
+        content_hash_cache.max_value_size = 50
+        content_hash_cache.clear()
+
+        for _ in range(3):
+            assert string_type.encode_value('USDC') == keccak(text='USDC')
+            assert bytes_type.encode_value(b'\x01\x02') == keccak(b'\x01\x02')
+            assert bytes_type.encode_value(big_value) == keccak(big_value)
+
+        assert content_hash_cache.stats() == {
+            'size': 2, 'maxsize': 10, 'hits': 4, 'misses': 2, 'max_value_size': 50, 'skipped': 3,
+        }
+
+        # Anything but bytes is hashed directly, including values without a length
+        assert content_hash_cache.keccak(bytearray(b'\x01\x02')) == keccak(b'\x01\x02')
+        assert content_hash_cache.keccak(5) == keccak(5)
+        assert content_hash_cache.stats()['skipped'] == 5
+        content_hash_cache.reset_stats()
+        assert content_hash_cache.stats()['skipped'] == 0
+    finally:
+        content_hash_cache.resize(0)
+        content_hash_cache.max_value_size = 1024
+        content_hash_cache.clear()
+
+
+def test_incremental_hashing():
+    class CountingUint(Uint):
+        encode_count = 0
+
+        def _encode_value(self, value):
+            CountingUint.encode_count += 1
+            return super(CountingUint, self)._encode_value(value)
+
+    class Asset(EIP712Struct):
+        amount = CountingUint(256)
+
+    class Order(EIP712Struct):
+        nonce = CountingUint(256)
+        expiry = CountingUint(256)
+        asset = Asset
+        fees = Array(Uint(256))
+
+    def expected_hash(order):
+        # Recompute from scratch, without any cached encodings
+        return Order(**order.data_dict()).hash_struct()
+
+    order = Order(nonce=1, expiry=100, asset=Asset(amount=5), fees=[1, 2])
+    first_hash = order.hash_struct()
+    assert CountingUint.encode_count == 3
+
+    # Nothing changed, so nothing is re-encoded
+    assert order.hash_struct() is first_hash
+    assert CountingUint.encode_count == 3
+
+    def assert_rehash(expected_encodes):
+        expected = expected_hash(order)
+        CountingUint.encode_count = 0
+        assert order.hash_struct() == expected
+        assert CountingUint.encode_count == expected_encodes
+
+    # Only the changed member is re-encoded
+    order['nonce'] = 2
+    assert_rehash(1)
+    order.set_data_value('expiry', 200)
+    assert_rehash(1)
+    order.values['nonce'] = 3
+    assert_rehash(1)
+    assert order.hash_struct() != first_hash
+
+    # Changes to nested structs and mutable values are picked up too
+    order['asset']['amount'] = 6
+    assert_rehash(1)
+    order['fees'].append(3)
+    assert_rehash(0)
+
+    # As are changes to the struct's type
+    Asset.token = Address()
+    order['asset']['token'] = os.urandom(20)
+    assert order.hash_struct() == expected_hash(order)
+
+
+def test_without_encoding_cache():
+    class Asset(EIP712Struct):
+        amount = Uint(256)
+
+    class Order(EIP712Struct):
+        cache_encodings = False
+        nonce = Uint(256)
+        asset = Asset
+
+    assert [name for name, _ in Order.get_members()] == ['nonce', 'asset']
+
+    order = Order(nonce=1, asset=Asset(amount=5))
+    first_hash = order.hash_struct()
+    assert order._encoding_cache is None
+    assert order['asset']._encoding_cache is not None  # Set per class
+
+    order.values['nonce'] = 2
+    assert order.hash_struct() != first_hash
+    assert order.hash_struct() == Order(nonce=2, asset=Asset(amount=5)).hash_struct()
+    assert order.encode_value() == Order(nonce=2, asset=Asset(amount=5)).encode_value()
+    assert order._encoding_cache is None
+
+
+def test_array_value():
+    class Bar(EIP712Struct):
+        u = Uint(256)
+
+    class Foo(EIP712Struct):
+        bars = Array(Bar)
+        nums = Array(Uint(256))
+
+    def check(foo):
+        plain = Foo(bars=list(foo['bars']), nums=list(foo['nums']))
+        assert foo.hash_struct() == plain.hash_struct()
+
+    bars = ArrayValue(Foo.bars, [Bar(u=i) for i in range(5)])
+    nums = ArrayValue(Foo.nums)
+    foo = Foo(bars=bars, nums=nums)
+    check(foo)
+
+    bars.append(Bar(u=5))
+    nums.append(1)
+    check(foo)
+    nums.extend([2, 3, 4])
+    check(foo)
+
+    bars[0] = Bar(u=100)
+    check(foo)
+    nums[1:3] = [7, 8, 9]
+    check(foo)
+    bars.insert(2, Bar(u=50))
+    check(foo)
+    del nums[0]
+    check(foo)
+    bars.append(Bar(u=6))
+    check(foo)
+
+    assert nums == [7, 8, 9, 4]
+    assert len(bars) == 8
+
+    # Invalid values are rejected without changing the array
+    with pytest.raises(OverflowError):
+        nums.append(-1)
+    with pytest.raises(OverflowError):
+        nums[0] = -1
+    assert nums == [7, 8, 9, 4]
+    check(foo)
+
+    assert foo.data_dict()['nums'] == [7, 8, 9, 4]
+
+    # Struct elements must be of the array's struct type, like in a list
+    class Other(EIP712Struct):
+        s = String()
+
+    with pytest.raises(ValueError):
+        ArrayValue(Foo.bars, [Other(s='x')])
+    with pytest.raises(ValueError):
+        bars.append(Other(s='x'))
+    with pytest.raises(ValueError):
+        bars[0] = Other(s='x')
+    assert len(bars) == 8
+    check(foo)
+
+    class Grid(EIP712Struct):
+        rows = Array(Array(Bar))
+
+    with pytest.raises(ValueError):
+        ArrayValue(Grid.rows, [[Other(s='x')]])
+
+
+# Module level, so they can be pickled
+class PickledBar(EIP712Struct):
+    u = Uint(256)
+
+
+class PickledFoo(EIP712Struct):
+    bars = Array(PickledBar)
+    nums = Array(Uint(256))
+
+
+def test_array_value_copies():
+    bars = ArrayValue(PickledFoo.bars, [PickledBar(u=i) for i in range(5)])
+    nums = ArrayValue(PickledFoo.nums, [1, 2, 3])
+    foo = PickledFoo(bars=bars, nums=nums)
+    expected = foo.hash_struct()
+
+    # Copies don't share their elements (or running hash) with the original
+    for copied in (copy.copy(bars), copy.deepcopy(bars), pickle.loads(pickle.dumps(bars))):
+        assert copied == bars
+        assert copied.hash() == bars.hash()
+        copied.append(PickledBar(u=5))
+        assert len(copied) == 6 and len(bars) == 5
+        assert copied.hash() == PickledFoo.bars.encode_value(list(copied))
+        assert bars.hash() == PickledFoo.bars.encode_value(list(bars))
+
+    deep = copy.deepcopy(bars)
+    assert deep.array_type is bars.array_type
+    assert deep[0] == bars[0] and deep[0] is not bars[0]
+
+    # Structs holding array values can be copied and pickled too
+    for copied in (copy.copy(foo), copy.deepcopy(foo), pickle.loads(pickle.dumps(foo))):
+        assert copied.hash_struct() == expected
+        assert copied == foo
+    copied = copy.deepcopy(foo)
+    copied['nums'].append(4)
+    assert foo.hash_struct() == expected
+    assert copied.hash_struct() == PickledFoo(bars=list(bars), nums=[1, 2, 3, 4]).hash_struct()
+
+
+def test_streamed_values():
+    class Foo(EIP712Struct):
+        blob = Bytes()
+        nums = Array(Uint(256))
+
+    data = os.urandom(300000)
+    nums = list(range(5000))  # Large enough to be hashed in several chunks
+    expected = Foo(blob=data, nums=nums).hash_struct()
+
+    def chunks():
+        for i in range(0, len(data), 1000):
+            yield data[i:i + 1000]
+
+    assert Foo(blob=io.BytesIO(data), nums=iter(nums)).hash_struct() == expected
+    assert Foo(blob=chunks(), nums=(n for n in nums)).hash_struct() == expected
+    assert Foo(blob=memoryview(data), nums=nums).hash_struct() == expected
+    assert Foo(blob=bytearray(data), nums=nums).hash_struct() == expected
+    assert Foo.compile().hash_struct({'blob': io.BytesIO(data), 'nums': iter(nums)}) == expected
+
+    # Streams are consumed once, and remembered after that
+    foo = Foo(blob=io.BytesIO(data), nums=iter(nums))
+    assert foo.hash_struct() == expected
+    foo['nums'] = iter(nums)
+    assert foo.hash_struct() == expected
+
+
+def test_compact_instances():
+    class Foo(EIP712Struct):
+        __slots__ = ()
+        s = String()
+        u = Uint(256)
+
+    class Bar(EIP712Struct):
+        __slots__ = ()
+        foo = Foo
+
+    bar = Bar(foo={'s': 'hello', 'u': 1})
+    assert not hasattr(bar, '__dict__')
+    assert not hasattr(bar['foo'], '__dict__')
+    with pytest.raises(AttributeError):
+        bar.extra = 1
+
+    assert bar.type_name == 'Bar'
+    assert bar['foo']['s'] == 'hello'
+    assert bar.hash_struct() == Bar(foo=Foo(s='hello', u=1)).hash_struct()
+
+    bar_copy = copy.deepcopy(bar)
+    assert bar_copy == bar
+    assert bar_copy.hash_struct() == bar.hash_struct()
+
+    # Classes built from a message are compact too
+    message = bar.to_message(make_domain(name='compact'))
+    assert not hasattr(EIP712Struct.from_message(message).message, '__dict__')
+
+
+def test_members_named_like_instance_attributes():
+    types = {
+        'EIP712Domain': [{'name': 'name', 'type': 'string'}],
+        'Batch': [{'name': 'values', 'type': 'string'}, {'name': '_encoding_cache', 'type': 'uint256'}],
+    }
+    message = {'primaryType': 'Batch', 'types': types, 'domain': {'name': 'clash'},
+               'message': {'values': 'hello', '_encoding_cache': 1}}
+
+    class Batch(EIP712Struct):
+        values = String()
+        _encoding_cache = Uint(256)
+
+    batch = Batch(values='hello', _encoding_cache=1)
+    assert batch['values'] == 'hello'
+    expected = batch.hash_struct()
+
+    # Classes built from a message keep their __dict__ when member names clash with instance attributes
+    result = EIP712Struct.from_message(message)
+    assert result.message['values'] == 'hello'
+    assert result.message.hash_struct() == expected
+    assert StructView.from_message(message).message.hash_struct() == expected
+    assert [m.hash_struct() for m, _ in iter_messages([json.dumps(message)])] == [expected]
+
+    with pytest.raises(TypeError, match='can not have members named values'):
+        class CompactBatch(EIP712Struct):
+            __slots__ = ()
+            values = String()
+
+
+def test_validation_without_hashing(monkeypatch):
+    class Bar(EIP712Struct):
+        s = String()
+
+    class Foo(EIP712Struct):
+        s = String()
+        b = Bytes()
+        i = Int(8)
+        u = Uint(8)
+        strings = Array(String())
+        bars = Array(Bar)
+        bar = Bar
+
+    def no_hashing(*args, **kwargs):
+        raise AssertionError('Values should not be hashed to validate them')
+
+    monkeypatch.setattr('eip712_structs.types.keccak', no_hashing)
+    monkeypatch.setattr('eip712_structs.types.keccak256', no_hashing)
+
+    foo = Foo()
+    foo['s'] = 'hello'
+    foo['b'] = os.urandom(100)
+    foo['b'] = '0x' + os.urandom(100).hex()
+    foo['i'] = -128
+    foo['u'] = 255
+    foo['strings'] = ['a', 'b']
+    foo['bars'] = [Bar(s='a')]
+    foo['bar'] = Bar(s='a')
+
+    for key, value in [('s', b'bytes'), ('b', 'not hex'), ('i', 128), ('i', 1.5), ('u', -1), ('u', '1'),
+                       ('strings', ['a', 1]), ('bars', [Bar(s='a'), 'b']), ('bar', Foo())]:
+        with pytest.raises(ValueError):
+            foo[key] = value
@@ -107,3 +107,47 @@ def test_circular_reference():
     assert A.encode_type() == expected_result_a
     assert B.encode_type() == expected_result_b
     assert C.encode_type() == expected_result_c
+
+
+def test_dynamic_members():
+    class Message(EIP712Struct):
+        pass
+
+    assert Message.get_members() == []
+    assert Message.encode_type() == 'Message()'
+
+    Message.to = Address()
+    setattr(Message, 'from', Address())
+    assert [name for name, _ in Message.get_members()] == ['to', 'from']
+    assert Message.encode_type() == 'Message(address to,address from)'
+
+    delattr(Message, 'to')
+    assert Message.encode_type() == 'Message(address from)'
+
+
+def test_cached_type_invalidation():
+    class Person(EIP712Struct):
+        name = String()
+
+    class Mail(EIP712Struct):
+        source = Person
+        content = String()
+
+    class Outbox(EIP712Struct):
+        mails = Array(Mail)
+
+    assert Mail.encode_type() == 'Mail(Person source,string content)Person(string name)'
+    assert Mail.encode_type() is Mail.encode_type()
+    mail_hash = Mail.type_hash()
+    outbox_sig = Outbox._encode_type(False)
+
+    # Changing a referenced struct must also refresh every struct that (transitively) includes it
+    Person.addr = Address()
+    assert Mail.encode_type() == 'Mail(Person source,string content)Person(string name,address addr)'
+    assert Mail.type_hash() != mail_hash
+    assert Outbox._encode_type(False) == outbox_sig
+
+    Mail.source = Person
+    Mail.extra = Uint(256)
+    assert Outbox._encode_type(False) == 'Outbox(Mail[] mails)'
+    assert Mail.encode_type() == 'Mail(Person source,string content,uint256 extra)Person(string name,address addr)'
@@ -0,0 +1,117 @@
+import io
+
+import pytest
+
+from eip712_structs import Array, EIP712Struct, String, Uint, instrumentation, make_domain
+from eip712_structs.jsonl import write_messages
+from eip712_structs.types import content_hash_cache
+
+
+class Person(EIP712Struct):
+    name = String()
+    scores = Array(Uint(256))
+
+
+class Mail(EIP712Struct):
+    source = Person
+    contents = String()
+
+
+@pytest.fixture(autouse=True)
+def clean_counters():
+    instrumentation.disable()
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def make_mail():
+    return Mail(source=Person(name='Cow', scores=[1, 2, 3]), contents='Hello!')
+
+
+def test_disabled_by_default():
+    original = EIP712Struct.__dict__['hash_struct']
+    assert not instrumentation.is_enabled()
+
+    make_mail().hash_struct()
+    assert instrumentation.snapshot()['operations'] == {}
+
+    with instrumentation.profiling():
+        assert EIP712Struct.__dict__['hash_struct'] is not original
+    assert EIP712Struct.__dict__['hash_struct'] is original
+    assert not instrumentation.is_enabled()
+
+
+def test_profiling():
+    expected = make_mail().hash_struct()
+    domain = make_domain(name='instrumentation')
+
+    with instrumentation.profiling() as profile:
+        mail = make_mail()
+        assert mail.hash_struct() == expected
+        message = mail.to_message(domain)
+        assert EIP712Struct.from_message(message).message.hash_struct() == expected
+        assert Mail.compile().hash_struct(message['message']) == expected
+
+    result = profile.snapshot()
+    assert result['enabled'] is True
+    operations = result['operations']
+    assert operations['struct.hash_struct']['calls'] == 4  # Mail and Person, twice
+    assert operations['struct.from_message']['calls'] == 1
+    assert operations['struct.build_classes']['calls'] == 1
+    assert operations['struct.to_message']['calls'] == 1
+    assert operations['compiled.hash_struct']['calls'] == 2
+    assert all(op['seconds'] >= 0 for op in operations.values())
+
+    # Struct hashes (type hash + 2 or 3 members), the array and both strings, twice over with both hashing paths
+    assert result['keccak']['calls'] > 0
+    assert result['keccak']['bytes'] >= 2 * (3 * 32 + 4 * 32 + 3 * 32 + len('Cow') + len('Hello!'))
+    assert result['caches']['message_struct_cache']['misses'] == 1
+
+    # Counters outlive the block, until reset
+    assert not instrumentation.is_enabled()
+    assert instrumentation.snapshot()['operations'] == operations
+    make_mail().hash_struct()
+    assert instrumentation.snapshot()['operations'] == operations
+    instrumentation.reset()
+    assert instrumentation.snapshot()['operations'] == {}
+
+
+def test_message_digests():
+    domain = make_domain(name='instrumentation')
+    domain.hash_struct()
+
+    def keccak_calls(fn):
+        mails = [make_mail() for _ in range(10)]
+        with instrumentation.profiling() as profile:
+            fn(mails)
+        return profile.snapshot()['keccak']['calls']
+
+    # Hashing each message, plus one more hash per message for its digest
+    hash_calls = keccak_calls(lambda mails: [mail.hash_struct() for mail in mails])
+    assert hash_calls > 0
+    assert keccak_calls(lambda mails: write_messages(io.StringIO(), mails, domain, digests=True)) == hash_calls + 10
+
+
+def test_nested_profiling():
+    instrumentation.enable()
+    make_mail().hash_struct()
+    with instrumentation.profiling() as profile:
+        Person(name='Bob').hash_struct()
+    assert profile.snapshot()['operations']['struct.hash_struct']['calls'] == 1
+    assert instrumentation.snapshot()['operations']['struct.hash_struct']['calls'] == 3
+    assert instrumentation.is_enabled()
+
+
+def test_cache_stats():
+    content_hash_cache.resize(16)
+    try:
+        with instrumentation.profiling() as profile:
+            String().encode_value('repeated')
+            String().encode_value('repeated')
+        assert profile.snapshot()['caches']['content_hash_cache']['hits'] == 1
+        assert profile.snapshot()['caches']['content_hash_cache']['misses'] == 1
+    finally:
+        content_hash_cache.resize(0)
+        content_hash_cache.clear()
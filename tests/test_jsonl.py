@@ -0,0 +1,150 @@
+import io
+import json
+import os
+
+import pytest
+from eth_utils.crypto import keccak
+
+from eip712_structs import Address, Array, Bytes, EIP712Struct, String, Uint, make_domain
+from eip712_structs.jsonl import iter_messages, write_messages
+from eip712_structs.struct import set_json_backend
+
+
+class Asset(EIP712Struct):
+    token = Address()
+    amount = Uint(256)
+
+
+class Order(EIP712Struct):
+    maker = Address()
+    asset = Asset
+    data = Bytes()
+
+
+class Note(EIP712Struct):
+    text = String()
+
+
+def make_lines(count):
+    domain = make_domain(name='jsonl', chainId=1)
+    structs = list()
+    for i in range(count):
+        structs.append(Order(maker=os.urandom(20), asset=Asset(token=os.urandom(20), amount=i), data=os.urandom(i)))
+        structs.append(Note(text=f'note {i}'))
+    return structs, domain, [s.to_message_json(domain) for s in structs]
+
+
+def test_iter_messages():
+    structs, domain, lines = make_lines(5)
+    results = list(iter_messages(io.StringIO('\n'.join(lines) + '\n\n')))
+    assert len(results) == len(structs)
+
+    for struct, (message, message_domain) in zip(structs, results):
+        assert message == struct
+        assert message_domain == domain
+        assert message.signable_bytes(message_domain) == struct.signable_bytes(domain)
+
+    # Messages sharing a types section share struct classes
+    assert type(results[0].message) is type(results[2].message)
+    assert type(results[1].message) is type(results[3].message)
+    assert type(results[0].message) is not type(results[1].message)
+
+
+def test_iter_message_digests(tmp_path):
+    structs, domain, lines = make_lines(5)
+    path = tmp_path / 'messages.jsonl'
+    path.write_text('\n'.join(lines))
+
+    expected = [keccak(s.signable_bytes(domain)) for s in structs]
+    assert list(iter_messages(path, digests=True)) == expected
+    assert list(iter_messages(str(path), digests=True)) == expected
+    assert list(iter_messages([line.encode() for line in lines], digests=True)) == expected
+
+
+def test_iter_message_digests_recursive_type():
+    class Node(EIP712Struct):
+        v = Uint(256)
+
+    Node.children = Array(Node)
+
+    domain = make_domain(name='jsonl')
+    nodes = [Node(v=i, children=[Node(v=i + 1, children=[Node(v=i + 2, children=[])])]) for i in range(3)]
+    lines = [node.to_message_json(domain) for node in nodes]
+    assert list(iter_messages(lines, digests=True)) == [keccak(node.signable_bytes(domain)) for node in nodes]
+    assert [result.message for result in iter_messages(lines)] == nodes
+
+
+def test_write_messages(tmp_path):
+    structs, domain, lines = make_lines(5)
+    path = tmp_path / 'messages.jsonl'
+    assert write_messages(path, iter(structs), domain, buffer_size=100) == len(structs)
+
+    written = path.read_text().splitlines()
+    assert [json.loads(line) for line in written] == [json.loads(line) for line in lines]
+    assert list(iter_messages(path, digests=True)) == [keccak(s.signable_bytes(domain)) for s in structs]
+
+    # Text streams work too, and digests may be added to each line - the same digests iter_messages reads back
+    stream = io.StringIO()
+    write_messages(stream, structs, domain, digests=True)
+    digests = list(iter_messages(io.StringIO(stream.getvalue()), digests=True))
+    for struct, line, digest in zip(structs, stream.getvalue().splitlines(), digests):
+        message = json.loads(line)
+        assert message['digest'] == '0x' + keccak(struct.signable_bytes(domain)).hex() == '0x' + digest.hex()
+        assert EIP712Struct.from_message(message).message == struct
+
+
+def test_write_messages_with_header():
+    structs, domain, _ = make_lines(5)
+    orders = structs[::2]
+    stream = io.BytesIO()
+    assert write_messages(stream, orders, domain, header=True, digests=True, buffer_size=1) == len(orders)
+
+    header, *lines = [json.loads(line) for line in stream.getvalue().decode().splitlines()]
+    assert header == {k: v for k, v in orders[0].to_message(domain).items() if k != 'message'}
+    assert len(lines) == len(orders)
+    for order, line in zip(orders, lines):
+        assert set(line) == {'message', 'digest'}
+        assert EIP712Struct.from_message(dict(header, **line)).message == order
+
+    stream.seek(0)
+    results = list(iter_messages(stream))
+    assert [result.message for result in results] == orders
+    assert all(result.domain == domain for result in results)
+
+    with pytest.raises(ValueError, match='all messages must be Order structs'):
+        write_messages(io.BytesIO(), structs, domain, header=True)
+
+
+@pytest.mark.parametrize('backend', [
+    lambda obj: json.dumps(obj, indent=2),
+    lambda obj: json.dumps(obj) + '\n',
+])
+def test_write_messages_non_compact_backend(backend):
+    structs, domain, _ = make_lines(2)
+    try:
+        set_json_backend(backend)
+        for header in (False, True):
+            with pytest.raises(ValueError, match='needs a compact JSON backend'):
+                write_messages(io.StringIO(), structs[::2], domain, header=header)
+
+        # A compact custom backend is fine
+        set_json_backend(lambda obj: json.dumps(obj, separators=(',', ':')))
+        stream = io.StringIO()
+        write_messages(stream, structs, domain)
+        stream.seek(0)
+        assert [result.message for result in iter_messages(stream)] == structs
+    finally:
+        set_json_backend('json')
+
+
+def test_iter_messages_invalid_header():
+    structs, domain, lines = make_lines(1)
+    message = json.loads(lines[0])
+
+    # A line with neither a message nor everything a header needs is an error, not a header
+    for missing in ('primaryType', 'types', 'domain'):
+        line = json.dumps({k: v for k, v in message.items() if k not in ('message', missing)})
+        with pytest.raises(ValueError, match=f'Missing: {missing}'):
+            list(iter_messages([line] + lines))
+    with pytest.raises(ValueError, match='Missing: primaryType, types, domain'):
+        list(iter_messages(['{"digest": "0x00"}'] + lines))
@@ -1,9 +1,12 @@
+import copy
 import json
 import os
 
 import pytest
 
-from eip712_structs import EIP712Struct, String, make_domain, Bytes
+from eip712_structs import Array, EIP712Struct, String, Uint, make_domain, Bytes
+from eip712_structs.struct import set_json_backend
+from eip712_structs.types import BytesJSONEncoder
 
 
 def test_flat_struct_to_message():
@@ -136,3 +139,154 @@ def test_bytes_json_encoder():
     foo.values['b'] = obj
     with pytest.raises(TypeError, match='not JSON serializable'):
         foo.to_message_json(domain)
+
+
+def test_from_message_class_cache():
+    class Foo(EIP712Struct):
+        s = String()
+        b = Bytes(32)
+    domain = make_domain(name='domain')
+
+    message = Foo(s='hello', b=os.urandom(32)).to_message(domain)
+    first = EIP712Struct.from_message(message)
+    second = EIP712Struct.from_message(json.loads(json.dumps(message, cls=BytesJSONEncoder)))
+
+    # Identical types sections share the same struct classes
+    assert type(first.message) is type(second.message)
+    assert type(first.domain) is type(second.domain)
+    assert first.message == second.message
+
+    # Any difference in the types section yields new classes. The types section is shared, so it must be copied first.
+    message['types'] = copy.deepcopy(message['types'])
+    message['types']['Foo'][0]['name'] = 'renamed'
+    message['message']['renamed'] = message['message'].pop('s')
+    third = EIP712Struct.from_message(message)
+    assert type(third.message) is not type(first.message)
+    assert third.message['renamed'] == 'hello'
+
+
+def test_struct_array_from_message():
+    message = {
+        'primaryType': 'Foo',
+        'types': {
+            'EIP712Domain': [{'name': 'name', 'type': 'string'}],
+            'Foo': [{'name': 'bars', 'type': 'Bar[][2]'}, {'name': 'bar', 'type': 'Bar'}],
+            'Bar': [{'name': 's', 'type': 'string'}],
+        },
+        'domain': {'name': 'domain'},
+        'message': {'bars': [], 'bar': {'s': 'bar'}},
+    }
+    foo = EIP712Struct.from_message(message).message
+    members = dict(foo.get_members())
+    assert members['bars'].type_name == 'Bar[][2]'
+    assert members['bars'].member_type.member_type is type(foo['bar'])
+
+    message['types']['Foo'][0]['type'] = 'Baz[]'
+    with pytest.raises(ValueError, match='Unknown type "Baz\\[\\]" for member "bars" of struct Foo'):
+        EIP712Struct.from_message(message)
+
+
+def test_array_members_to_message():
+    class Bar(EIP712Struct):
+        nums = Array(Uint(256))
+
+    class Foo(EIP712Struct):
+        bar = Bar
+        names = Array(String())
+
+    foo = Foo(bar=Bar(nums=[1, 2]), names=['a', 'b'])
+    domain = make_domain(name='arrays')
+    message = foo.to_message(domain)
+    assert message['message'] == {'bar': {'nums': [1, 2]}, 'names': ['a', 'b']}
+    assert set(message['types']) == {'EIP712Domain', 'Foo', 'Bar'}
+    assert EIP712Struct.from_message(message).message.hash_struct() == foo.hash_struct()
+
+
+def test_message_json_matches_message():
+    class Item(EIP712Struct):
+        data = Bytes()
+
+    class Foo(EIP712Struct):
+        name = String()
+        raw = Bytes(4)
+        items = Array(Item)
+        blobs = Array(Bytes())
+
+    foo = Foo(name='foo', raw=b'\x01\x02\x03\x04', items=[Item(data=b'\xff'), Item(data=b'')], blobs=[b'\x00'])
+    domain = make_domain(name='json', chainId=1)
+
+    message = foo.to_message(domain)
+    assert list(message['types']) == ['EIP712Domain', 'Foo', 'Item']
+    assert json.loads(foo.to_message_json(domain)) == json.loads(json.dumps(message, cls=BytesJSONEncoder))
+    assert json.loads(foo.to_message_json(domain))['message']['items'] == [{'data': '0xff'}, {'data': '0x'}]
+    assert EIP712Struct.from_message(json.loads(foo.to_message_json(domain))).message.hash_struct() == \
+        foo.hash_struct()
+
+    # The types section follows changes to a struct's members
+    Item.extra = Uint(256)
+    assert foo.to_message(domain)['types']['Item'] == [{'name': 'data', 'type': 'bytes'},
+                                                       {'name': 'extra', 'type': 'uint256'}]
+
+
+def test_json_backends():
+    foo_class = type('Foo', (EIP712Struct,), {'b': Bytes(), 'u': Uint(256)})
+    foo = foo_class(b=b'\x12', u=2 ** 255)
+    domain = make_domain(name='backends')
+    expected = json.loads(foo.to_message_json(domain))
+    try:
+        set_json_backend(lambda obj: json.dumps(obj, indent=2))
+        assert '\n' in foo.to_message_json(domain)
+        assert json.loads(foo.to_message_json(domain)) == expected
+
+        pytest.importorskip('orjson')
+        set_json_backend('orjson')
+        assert json.loads(foo.to_message_json(domain)) == expected
+        foo['u'] = 1
+        assert json.loads(foo.to_message_json(domain))['message'] == {'b': '0x12', 'u': 1}
+
+        with pytest.raises(ValueError, match='Unknown JSON backend'):
+            set_json_backend('pickle')
+    finally:
+        set_json_backend('json')
+
+
+def test_frozen_message_types():
+    class Foo(EIP712Struct):
+        s = String()
+
+    domain = make_domain(name='frozen')
+    first = Foo(s='a').to_message(domain)
+    second = Foo(s='b').to_message(domain)
+    assert first['types'] is second['types']
+    assert first['types'] == {
+        'EIP712Domain': [{'name': 'name', 'type': 'string'}],
+        'Foo': [{'name': 's', 'type': 'string'}],
+    }
+
+    with pytest.raises(TypeError):
+        first['types']['Bar'] = []
+    with pytest.raises(TypeError):
+        first['types']['Foo'].append({'name': 'x', 'type': 'string'})
+    with pytest.raises(TypeError):
+        first['types']['Foo'][0]['name'] = 'x'
+
+    types = copy.deepcopy(first['types'])
+    types['Foo'][0]['name'] = 'x'
+    assert type(types) is dict and type(types['Foo']) is list
+    assert Foo(s='a').to_message(domain)['types']['Foo'] == [{'name': 's', 'type': 'string'}]
+
+    # Changing the struct builds a new types section
+    Foo.u = Uint(256)
+    assert Foo(s='c').to_message(domain)['types']['Foo'] == [{'name': 's', 'type': 'string'},
+                                                             {'name': 'u', 'type': 'uint256'}]
+
+    # Domain classes with the same members share a types section, however many of them there are
+    for _ in range(10):
+        domain_class = EIP712Struct._structs_from_types(first['types'])['EIP712Domain']
+        assert domain_class is not type(domain)
+        assert Foo(s='d').to_message(domain_class(name='frozen'))['types'] is Foo(s='d').to_message(domain)['types']
+    assert len([key for key in Foo._class_cache() if isinstance(key, tuple) and key[0] == 'message_types']) == 1
+
+    # Changing the domain's members builds a new types section
+    assert list(Foo(s='e').to_message(make_domain(name='frozen', chainId=1))['types']['EIP712Domain']) == [
+        {'name': 'name', 'type': 'string'}, {'name': 'chainId', 'type': 'uint256'}]
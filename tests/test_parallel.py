@@ -0,0 +1,94 @@
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from eip712_structs import Address, Array, EIP712Struct, String, Uint, make_domain
+from eip712_structs.parallel import StructSchema, hash_parallel, rebuilt_struct_cache, signable_bytes_parallel
+
+
+class Token(EIP712Struct):
+    symbol = String()
+    address = Address()
+
+
+class Order(EIP712Struct):
+    maker = Address()
+    token = Token
+    amounts = Array(Uint(256))
+
+
+def make_orders(count):
+    return [{
+        'maker': os.urandom(20),
+        'token': {'symbol': f'TKN{i}', 'address': os.urandom(20)},
+        'amounts': [i, i * 2],
+    } for i in range(count)]
+
+
+def test_struct_schema():
+    class Bar(EIP712Struct):
+        u = Uint(256)
+
+    class Foo(EIP712Struct):
+        bars = Array(Bar)
+
+    schema = StructSchema.from_struct(Foo)
+    assert set(schema.types) == {'Foo', 'Bar'}
+
+    unpickled = pickle.loads(pickle.dumps(schema))
+    rebuilt = unpickled.to_struct()
+    assert rebuilt is not Foo
+    assert rebuilt.encode_type() == Foo.encode_type()
+    assert unpickled.to_struct() is rebuilt
+
+
+def test_hash_parallel():
+    orders = make_orders(25)
+    expected = [Order(**o).hash_struct() for o in orders]
+
+    assert list(hash_parallel(Order, orders, chunk_size=4, max_workers=2)) == expected
+    assert list(hash_parallel(Order, iter(orders), chunk_size=100, max_workers=2)) == expected
+    assert list(hash_parallel(Order, [], max_workers=2)) == []
+
+    # Struct instances, and user-provided executors work too
+    structs = [Order(**o) for o in orders]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(hash_parallel(Order, structs, chunk_size=3, executor=executor)) == expected
+
+    # Invalid arguments are rejected right away, not when the results are first read
+    with pytest.raises(ValueError, match='Chunk size must be at least 1'):
+        hash_parallel(Order, orders, chunk_size=0)
+    with pytest.raises(ValueError, match='Chunk size must be at least 1'):
+        signable_bytes_parallel(Order, orders, make_domain(name='parallel'), chunk_size=0)
+
+
+def test_signable_bytes_parallel():
+    class Foo(EIP712Struct):
+        s = String()
+        tokens = Array(Token)
+
+    domain = make_domain(name='parallel')
+    foos = [Foo(s=str(i), tokens=[Token(symbol='A', address=os.urandom(20))]) for i in range(10)]
+    expected = [foo.signable_bytes(domain) for foo in foos]
+    assert list(signable_bytes_parallel(Foo, foos, domain, chunk_size=3, max_workers=2)) == expected
+
+
+def test_hash_parallel_recursive_type():
+    class Node(EIP712Struct):
+        v = Uint(256)
+
+    Node.children = Array(Node)
+
+    nodes = [Node(v=i, children=[Node(v=i + 1, children=[])]) for i in range(10)]
+    expected = [node.hash_struct() for node in nodes]
+    assert list(hash_parallel(Node, nodes, chunk_size=3, max_workers=2)) == expected
+
+
+def test_rebuilt_struct_cache():
+    rebuilt_struct_cache.clear()
+    schema = StructSchema.from_struct(Order)
+    assert schema.to_struct() is schema.to_struct()
+    assert rebuilt_struct_cache.stats()['size'] == 1
+    assert rebuilt_struct_cache.maxsize > 0
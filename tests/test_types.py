@@ -1,7 +1,7 @@
 import pytest
 
 from eip712_structs import Address, Array, Boolean, Bytes, Int, String, Uint, EIP712Struct
-from eip712_structs.types import from_solidity_type
+from eip712_structs.types import from_solidity_type, parse_type_string
 
 
 def test_bytes_validation():
@@ -85,3 +85,27 @@ def test_from_solidity_type():
     assert from_solidity_type('bytes16[32]') != Array(Bytes(16), 31)
     assert from_solidity_type('bytes16[32]') != Array(Bytes(), 32)
     assert from_solidity_type('bytes16[32]') != Array(Bytes(8), 32)
+
+
+def test_from_solidity_type_nested_arrays():
+    assert from_solidity_type('uint256[][3]') == Array(Array(Uint(256)), 3)
+    assert from_solidity_type('uint256[][3]').type_name == 'uint256[][3]'
+    assert from_solidity_type('bytes32[2][]') == Array(Array(Bytes(32), 2))
+
+    # Parsed types are memoized and shared
+    assert from_solidity_type('address') is from_solidity_type('address')
+    assert from_solidity_type('address[4]').member_type is from_solidity_type('address')
+
+    # Unknown or malformed types aren't basic types
+    assert from_solidity_type('Person') is None
+    assert from_solidity_type('Person[]') is None
+    assert from_solidity_type('foo256') is None
+    assert from_solidity_type('uint256[') is None
+
+
+def test_parse_type_string():
+    assert parse_type_string('uint256') == ('uint256', ())
+    assert parse_type_string('Person[]') == ('Person', (0,))
+    assert parse_type_string('Person[][3]') == ('Person', (0, 3))
+    assert parse_type_string('Person[') is None
+    assert parse_type_string('') is None
@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from eip712_structs import Address, Array, Bytes, EIP712Struct, String, Uint, make_domain
+from eip712_structs.view import StructView
+
+
+class Person(EIP712Struct):
+    name = String()
+    wallet = Address()
+
+
+class Mail(EIP712Struct):
+    source = Person
+    dest = Person
+    contents = String()
+    attachment = Bytes()
+    amounts = Array(Uint(256))
+
+
+def make_mail_values():
+    return {
+        'source': {'name': 'Cow', 'wallet': os.urandom(20)},
+        'dest': {'name': 'Bob', 'wallet': os.urandom(20)},
+        'contents': 'Hello, Bob!',
+        'attachment': os.urandom(100),
+        'amounts': [1, 2, 3],
+    }
+
+
+def test_view_matches_struct():
+    values = make_mail_values()
+    mail = Mail(**values)
+    view = Mail.view(values)
+    domain = make_domain(name='view test', version='1')
+
+    assert view.type_name == 'Mail'
+    assert view.type_hash() == Mail.type_hash()
+    assert view.encode_value() == mail.encode_value()
+    assert view.hash_struct() == mail.hash_struct()
+    assert view.signable_bytes(domain) == mail.signable_bytes(domain)
+
+
+def test_view_field_access():
+    values = make_mail_values()
+    view = StructView(Mail, values)
+
+    assert view['contents'] == 'Hello, Bob!'
+    assert view['amounts'] is values['amounts']
+    assert isinstance(view['source'], StructView)
+    assert view['source']['name'] == 'Cow'
+    assert view['source'].hash_struct() == Person(**values['source']).hash_struct()
+    assert list(view) == ['source', 'dest', 'contents', 'attachment', 'amounts']
+    assert len(view) == 5
+
+    with pytest.raises(KeyError):
+        view['unknown']
+
+    # Views aren't copies
+    values['contents'] = 'Changed'
+    assert view['contents'] == 'Changed'
+    assert view.hash_struct() == Mail(**values).hash_struct()
+
+
+def test_view_from_message():
+    values = make_mail_values()
+    domain = make_domain(name='view test', version='1')
+    message = json.loads(Mail(**values).to_message_json(domain))
+
+    result = StructView.from_message(message)
+    assert result.message.type_name == 'Mail'
+    assert result.message['source']['name'] == 'Cow'
+    assert result.message._values is message['message']
+    assert result.domain.hash_struct() == domain.hash_struct()
+
+    # Views may be used as the domain of another view
+    assert result.message.signable_bytes(result.domain) == Mail(**values).signable_bytes(domain)
+
+
+def test_view_recursive_type():
+    class Node(EIP712Struct):
+        v = Uint(256)
+
+    Node.children = Array(Node)
+
+    values = {'v': 1, 'children': [{'v': 2, 'children': []}, {'v': 3, 'children': [{'v': 4, 'children': []}]}]}
+    view = Node.view(values)
+    node = Node(**values)
+
+    assert view.encode_value() == node.encode_value()
+    assert view.hash_struct() == node.hash_struct()
+    assert view['children'][1]['v'] == 3